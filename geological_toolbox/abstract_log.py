@@ -6,7 +6,10 @@ This module provides an abstract base class for storing logging or property info
 import sqlalchemy as sq
 import sys
 
-from geological_toolbox.db_handler import AbstractDBObject
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any
+
+from geological_toolbox.db_handler import AbstractDBObject, _clamp
 
 
 class AbstractLogClass(AbstractDBObject):
@@ -19,6 +22,8 @@ class AbstractLogClass(AbstractDBObject):
     :return: Nothing
     """
 
+    __slots__ = ()
+
     # define table_columns
     prop_name = sq.Column(sq.VARCHAR(50), default="")
     prop_unit = sq.Column(sq.VARCHAR(100), default="")
@@ -51,7 +56,7 @@ class AbstractLogClass(AbstractDBObject):
 
         :return: the name of the property
         """
-        return str(self.prop_name)
+        return sys.intern(str(self.prop_name))
 
     @property_name.setter
     def property_name(self, name: str) -> None:
@@ -61,10 +66,7 @@ class AbstractLogClass(AbstractDBObject):
         :param name: new property name
         :return: Nothing
         """
-        name = str(name)
-        if len(name) > 100:
-            name = name[:100]
-        self.prop_name = name
+        self.prop_name = sys.intern(_clamp(name, 50))
 
     @property
     def property_unit(self) -> str:
@@ -73,10 +75,7 @@ class AbstractLogClass(AbstractDBObject):
 
         :return: the unit of the property
         """
-        if sys.version_info[0] == 2:
-            return self.prop_unit
-        else:
-            return self.prop_unit
+        return self.prop_unit
 
     @property_unit.setter
     def property_unit(self, unit: str) -> None:
@@ -86,11 +85,16 @@ class AbstractLogClass(AbstractDBObject):
         :param unit: property unit as string
         :return: Nothing
         """
-        if sys.version_info[0] == 2:
-            unit = unit
-
-        if len(unit) > 100:
-            unit = unit[:100]
-        self.prop_unit = unit
+        self.prop_unit = sys.intern(_clamp(unit, 100))
 
 
+@sq.event.listens_for(AbstractLogClass, "load", propagate=True)
+def _intern_on_load(target: AbstractLogClass, context: Any) -> None:
+    """
+    Interns the names and units of loaded logs and properties. These values repeat for many objects, all of them share
+    one string object afterwards.
+    """
+    for key in ("prop_name", "prop_unit"):
+        value = target.__dict__.get(key)
+        if type(value) is str:
+            set_committed_value(target, key, sys.intern(value))
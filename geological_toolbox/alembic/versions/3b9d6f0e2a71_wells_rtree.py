@@ -0,0 +1,45 @@
+"""wells_rtree
+
+Revision ID: 3b9d6f0e2a71
+Revises: e1f7a3c52b84
+Create Date: 2026-10-16 20:48:27.904113
+
+"""
+from alembic import op
+import sqlalchemy as sq
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d6f0e2a71'
+down_revision = 'e1f7a3c52b84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # R*Tree index of the well coordinates, only available on SQLite databases
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("CREATE VIRTUAL TABLE wells_rtree USING rtree(id, minX, maxX, minY, maxY)")
+    op.execute("CREATE TRIGGER wells_rtree_insert AFTER INSERT ON wells "
+               "WHEN new.east IS NOT NULL AND new.north IS NOT NULL BEGIN "
+               "INSERT INTO wells_rtree VALUES (new.id, new.east, new.east, new.north, new.north); END")
+    op.execute("CREATE TRIGGER wells_rtree_update AFTER UPDATE OF id, east, north ON wells BEGIN "
+               "DELETE FROM wells_rtree WHERE id = old.id; "
+               "INSERT INTO wells_rtree SELECT new.id, new.east, new.east, new.north, new.north "
+               "WHERE new.east IS NOT NULL AND new.north IS NOT NULL; END")
+    op.execute("CREATE TRIGGER wells_rtree_delete AFTER DELETE ON wells BEGIN "
+               "DELETE FROM wells_rtree WHERE id = old.id; END")
+    op.execute("INSERT INTO wells_rtree SELECT id, east, east, north, north FROM wells "
+               "WHERE east IS NOT NULL AND north IS NOT NULL")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER wells_rtree_delete")
+    op.execute("DROP TRIGGER wells_rtree_update")
+    op.execute("DROP TRIGGER wells_rtree_insert")
+    op.execute("DROP TABLE wells_rtree")
@@ -0,0 +1,30 @@
+"""coordinate_indexes
+
+Revision ID: 5a3d8c1e7f92
+Revises: 2ec5e0e664cf
+Create Date: 2026-10-16 17:45:12.318204
+
+"""
+from alembic import op
+import sqlalchemy as sq
+
+
+# revision identifiers, used by Alembic.
+revision = '5a3d8c1e7f92'
+down_revision = '2ec5e0e664cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_wells_east'), 'wells', ['east'], unique=False)
+    op.create_index(op.f('ix_wells_north'), 'wells', ['north'], unique=False)
+    op.create_index(op.f('ix_geopoints_east'), 'geopoints', ['east'], unique=False)
+    op.create_index(op.f('ix_geopoints_north'), 'geopoints', ['north'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_geopoints_north'), table_name='geopoints')
+    op.drop_index(op.f('ix_geopoints_east'), table_name='geopoints')
+    op.drop_index(op.f('ix_wells_north'), table_name='wells')
+    op.drop_index(op.f('ix_wells_east'), table_name='wells')
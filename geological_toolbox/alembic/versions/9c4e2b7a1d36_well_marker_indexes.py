@@ -0,0 +1,26 @@
+"""well_marker_indexes
+
+Revision ID: 9c4e2b7a1d36
+Revises: 5a3d8c1e7f92
+Create Date: 2026-10-16 19:02:41.557120
+
+"""
+from alembic import op
+import sqlalchemy as sq
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e2b7a1d36'
+down_revision = '5a3d8c1e7f92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_wm_well_horizon', 'well_marker', ['well_id', 'horizon_id'], unique=False)
+    op.create_index('ix_wm_well_depth', 'well_marker', ['well_id', 'drill_depth'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_wm_well_depth', table_name='well_marker')
+    op.drop_index('ix_wm_well_horizon', table_name='well_marker')
@@ -0,0 +1,28 @@
+"""well_search_indexes
+
+Revision ID: e1f7a3c52b84
+Revises: 9c4e2b7a1d36
+Create Date: 2026-10-16 20:11:05.318904
+
+"""
+from alembic import op
+import sqlalchemy as sq
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f7a3c52b84'
+down_revision = '9c4e2b7a1d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('coordinate_index', 'wells', ['east', 'north'], unique=False)
+    op.create_index('ix_wells_depth', 'wells', ['drill_depth'], unique=False)
+    op.create_index('ix_well_marker_horizon', 'well_marker', ['horizon_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_well_marker_horizon', table_name='well_marker')
+    op.drop_index('ix_wells_depth', table_name='wells')
+    op.drop_index('coordinate_index', table_name='wells')
@@ -11,17 +11,134 @@ import sqlalchemy as sq
 from alembic import command, script
 from alembic.config import Config
 from alembic.runtime import migration
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.orm import configure_mappers, scoped_session, selectinload, sessionmaker
 from sqlalchemy.orm.session import Session
-from typing import List
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from weakref import WeakValueDictionary
 
 from geological_toolbox.exceptions import DatabaseRequestException
 
 Base = declarative_base()
 
+_bulk_mode = ContextVar("bulk_mode", default=False)
+"""
+True while a bulk save or a deferred commit is running, :meth:`AbstractDBObject.save_to_db` only adds objects to the
+session then
+"""
+
+
+@contextmanager
+def _in_bulk():
+    """
+    Context manager activating the bulk mode for the current thread / task. Inside this context
+    :meth:`AbstractDBObject.save_to_db` doesn't commit, the commit is done once by the bulk function.
+    """
+    token = _bulk_mode.set(True)
+    try:
+        yield
+    finally:
+        _bulk_mode.reset(token)
+
+
+class ToolboxSession(Session):
+    """
+    Session class of the sessions created by :class:`DBHandler`. The per-session caches of the database classes are
+    only used by sessions of this class, their listeners are registered on this class instead of all SQLAlchemy
+    sessions. Bind own sessions with this class (e.g. ToolboxSession(bind=connection)) to use the caches.
+    """
+
+
+_SessionType = ToolboxSession
+
+_engines: "WeakValueDictionary[Tuple[str, str, str], Any]" = WeakValueDictionary()
+"""
+Engines of the DBHandler instances by connection uri and engine arguments. An engine is dropped together with the last
+handler using it.
+"""
+
+_INTEGRITY_ERROR_MESSAGE = "Cannot commit changes in table, Integrity Error (double unique values?) -- {} -- " \
+                           "Rolling back changes..."
+
+_statements: Dict[Tuple[type, str], Any] = dict()
+"""
+Cache of prebuilt select statements per class, see :meth:`AbstractDBObject._statement`
+"""
+
+
+def _check_session(session: Any) -> None:
+    """
+    Checks, if session is a SQLAlchemy Session. The error message is only built if the check fails.
+
+    :param session: value to be checked
+    :return: Nothing
+    :raises TypeError: if session is not of type SQLAlchemy Session
+    """
+    # identity check first, most sessions are created by the DBHandler
+    if type(session) is not _SessionType and not isinstance(session, Session):
+        raise TypeError("'session' is not of type SQLAlchemy Session (it is {})!".format(type(session)))
+
+
+def _set_sqlite_pragma(dbapi_connection: Any, connection_record: Any) -> None:
+    """
+    Switches new connections to a SQLite database file to write-ahead logging with normal synchronisation and keeps
+    temporary tables in memory. This reduces the costs of a commit.
+
+    :param dbapi_connection: DBAPI connection created by the engine
+    :param connection_record: connection record of the pool, not used
+    :return: Nothing
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _clamp(value: Any, length: int) -> str:
+    """
+    Converts value to a string with a maximum length of length characters. Strings, which are already short enough,
+    are returned without any copy.
+
+    :param value: value to be converted
+    :param length: maximum number of characters
+    :return: the (shortened) string
+    """
+    if type(value) is str and len(value) <= length:
+        return value
+    return str(value)[:length]
+
+
+def _alembic_config() -> Config:
+    """
+    Returns a new alembic configuration of the package. The script location is changed to an absolute path, as alembic
+    has problems, when it is called inside a library.
+
+    :return: the alembic configuration
+    """
+    local_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))  # script directory
+    alembic_cfg = Config(os.path.abspath(os.path.join(local_dir, "alembic.ini")))
+    alembic_cfg.set_main_option(
+        "script_location",
+        os.path.abspath(os.path.join(local_dir, alembic_cfg.get_main_option("script_location", "alembic")))
+    )
+    return alembic_cfg
+
+
+@lru_cache(maxsize=None)
+def _alembic_script_directory() -> script.ScriptDirectory:
+    """
+    Returns the alembic script directory of the package. The revision files are only read once, the directory is shared
+    by all DBHandler.
+
+    :return: the alembic script directory
+    """
+    return script.ScriptDirectory.from_config(_alembic_config())
+
 
 class DBHandler(object):
     """
@@ -40,19 +157,55 @@ class DBHandler(object):
         self.__args = args
         self.__kwargs = kwargs
 
-        self.__engine = sq.create_engine(self.__connection, *self.__args, **self.__kwargs)
-        self.__last_session = None
+        # room for the compiled versions of the cached statements of all classes
+        self.__kwargs.setdefault("query_cache_size", 1200)
+
+        url = sq.engine.make_url(self.__connection)
+        sqlite = url.get_backend_name() == "sqlite"
+        # includes shared in-memory databases like sqlite:///file:name?mode=memory&cache=shared&uri=true
+        in_memory = sqlite and ((url.database in (None, "", ":memory:")) or (url.query.get("mode") == "memory"))
+        if not sqlite:
+            # SQLite uses its own pool implementations without these options
+            self.__kwargs.setdefault("pool_size", 10)
+            self.__kwargs.setdefault("max_overflow", 20)
+            self.__kwargs.setdefault("pool_pre_ping", True)
+
+        # handlers for the same database share one engine and its connection pool
+        # in-memory databases are private to each handler and are never shared (shared-cache in-memory databases are
+        # shared by SQLite itself between the engines of one process)
+        key = (self.__connection, repr(self.__args), repr(sorted(self.__kwargs.items())))
+        self.__engine = None if in_memory else _engines.get(key)
+        if self.__engine is None:
+            self.__engine = sq.create_engine(self.__connection, *self.__args, **self.__kwargs)
+            if not in_memory:
+                if sqlite:
+                    sq.event.listen(self.__engine, "connect", _set_sqlite_pragma)
+                _engines[key] = self.__engine
+
         self.__config = "alembic.ini"
 
-        in_memory = self.__connection in ["sqlite://", "sqlite:///:memory:"]
+        # loaded attribute values stay valid after a commit, they are not reloaded on the next access
+        self.__sessionmaker = sessionmaker(bind=self.__engine, class_=ToolboxSession, expire_on_commit=False)
+        # one session per thread, reused by all get_session calls
+        self.__scoped_session = scoped_session(self.__sessionmaker)
+
         if not (in_memory or self.check_current_head()):
             self.start_db_migration()
 
         if in_memory:
             Base.metadata.create_all(self.__engine)
 
-        self.__sessionmaker = sessionmaker(bind=self.__engine)
-        self.create_new_session()
+        # configure all mapped classes now instead of during the first query
+        configure_mappers()
+
+    @property
+    def engine(self) -> sq.engine.Engine:
+        """
+        SQLAlchemy engine of the database connection, e.g. to bind sessions to an own connection
+
+        :return: the SQLAlchemy engine
+        """
+        return self.__engine
 
     def check_current_head(self) -> bool:
         """
@@ -61,17 +214,7 @@ class DBHandler(object):
 
         :return: True if both version are matching, else False
         """
-        local_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))  # script directory
-        alembic_cfg = Config(os.path.abspath(os.path.join(local_dir, "alembic.ini")))
-
-        # Alembic has problems, when called inside a library,
-        # therefore we change the current folder with its absolute path
-        alembic_cfg.set_main_option(
-            "script_location",
-            os.path.abspath(os.path.join(local_dir, alembic_cfg.get_main_option("script_location", "alembic")))
-        )
-
-        directory = script.ScriptDirectory.from_config(alembic_cfg)
+        directory = _alembic_script_directory()
         with self.__engine.begin() as connection:
             context = migration.MigrationContext.configure(connection)
             return set(context.get_current_heads()) == set(directory.get_heads())
@@ -79,55 +222,77 @@ class DBHandler(object):
     def start_db_migration(self) -> None:
         """
         Runs alembic to upgrade the selected database to the current conversion head. This ensures that the database
-        schema version matches the python ORM version.
+        schema version matches the python ORM version. A new (empty) database is created directly from the ORM schema
+        and stamped with the head revision instead of running every migration step.
 
         :return: Nothing
         """
-        self.close_last_session()
-
-        local_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))  # script directory
-        alembic_cfg = Config(os.path.abspath(os.path.join(local_dir, "alembic.ini")))
+        self.close_session()
 
-        # Alembic has problems, when called inside a library,
-        # therefore we change the current alembic folder with its absolute path
-        alembic_cfg.set_main_option(
-            "script_location",
-            os.path.abspath(os.path.join(local_dir, alembic_cfg.get_main_option("script_location", "alembic")))
-        )
+        alembic_cfg = _alembic_config()
         alembic_cfg.set_main_option("sqlalchemy.url", self.__connection)
+
+        # all database classes have to be imported to create the complete schema
+        from geological_toolbox import database_objects
+
+        with self.__engine.begin() as connection:
+            if len(sq.inspect(connection).get_table_names()) == 0:
+                database_objects.Base.metadata.create_all(connection)
+                context = migration.MigrationContext.configure(connection)
+                context.stamp(_alembic_script_directory(), "head")
+                return
+
         command.upgrade(alembic_cfg, "head")
 
     def create_new_session(self) -> Session:
         """
-        Creates and returns a new session object
+        Creates and returns a new session object. The session is independent of the session returned by
+        :meth:`DBHandler.get_session`, which stays open.
 
         :return: returns a newly created session object
         """
-        self.__last_session = self.__sessionmaker()
-        return self.__last_session
+        return self.__sessionmaker()
 
     def get_session(self) -> Session:
         """
-        Returns the session object for the current database connection
-        returns: Returns the session object for the current database connection
+        Returns the session object for the current database connection. The session is created on the first call and
+        reused by all further calls of the same thread.
+
+        :return: Returns the session object for the current database connection
+        """
+        return self.__scoped_session()
+
+    def close_session(self) -> None:
         """
-        if self.__last_session is None:
-            return self.create_new_session()
-        else:
-            return self.__last_session
+        Closes the session of the current thread. The next call of :meth:`DBHandler.get_session` creates a new one.
+
+        :return: Nothing
+        """
+        self.__scoped_session.remove()
 
     def close_last_session(self) -> None:
         """
-        Close the actual session
+        Close the actual session, same as :meth:`DBHandler.close_session`
+
+        :return: Nothing
+        """
+        self.close_session()
+
+    def dispose(self) -> None:
+        """
+        Closes the session of the current thread and all pooled connections of the engine. The engine is removed from
+        the engines shared between the handlers, the next handler for the same database creates a new one. Other
+        handlers still using the engine open new connections on demand.
 
         :return: Nothing
         """
-        if self.__last_session is not None:
-            self.__last_session.close()
-            self.__last_session = None
+        self.close_session()
+        for key, engine in list(_engines.items()):
+            if engine is self.__engine:
+                del _engines[key]
+        self.__engine.dispose()
 
 
-# class AbstractDBObject(object):
 class AbstractDBObject(object):
     """
     This class represents the base for all database objects. It should be treated as abstract, no object should be
@@ -143,6 +308,9 @@ class AbstractDBObject(object):
     :raises TypeError: if session is not of type SQLAlchemy Session
     """
 
+    # plain python attributes are stored in slots, the instance dictionary is only used for the mapped columns
+    __slots__ = ("__session",)
+
     id = None
     name_col = sq.Column(sq.VARCHAR(100), default="")
     comment_col = sq.Column(sq.VARCHAR(100), default="")
@@ -152,9 +320,7 @@ class AbstractDBObject(object):
         Initialises the class
         """
 
-        if not isinstance(session, Session):
-            raise TypeError("'session' value is not of type SQLAlchemy Session!\n{} - {}".format(str(type(session)),
-                                                                                                 str(Session)))
+        _check_session(session)
 
         self.__session = session
         self.comment = comment
@@ -180,10 +346,7 @@ class AbstractDBObject(object):
         """
         see getter
         """
-        comment = str(comment)
-        if len(comment) > 100:
-            comment = comment[:100]
-        self.comment_col = comment
+        self.comment_col = _clamp(comment, 100)
 
     def get_id(self) -> int or None:
         """
@@ -203,10 +366,7 @@ class AbstractDBObject(object):
         """
         see getter
         """
-        new_name = str(new_name)
-        if len(new_name) > 100:
-            new_name = new_name[:100]
-        self.name_col = new_name
+        self.name_col = _clamp(new_name, 100)
 
     @property
     def session(self) -> Session:
@@ -223,8 +383,7 @@ class AbstractDBObject(object):
         see getter
         """
 
-        if not isinstance(session, Session):
-            raise TypeError("Value is not of type {} (it is {})!".format(Session, type(session)))
+        _check_session(session)
 
         self.__session = session
 
@@ -237,18 +396,78 @@ class AbstractDBObject(object):
         :raises IntegrityError: raises IntegrityError if the commit to the database fails and rolls all changes back
         """
         self.__session.add(self)
+        if _bulk_mode.get():
+            # commit is deferred to the surrounding bulk operation
+            return
         try:
             self.__session.commit()
         except IntegrityError as e:
             # Failure during database processing? -> rollback changes and raise error again
             self.__session.rollback()
-            raise IntegrityError(
-                "Cannot commit changes in table, Integrity Error (double unique values?) -- {} -- " +
-                "Rolling back changes...".format(e.statement), e.params, e.orig, e.connection_invalidated)
+            raise IntegrityError(_INTEGRITY_ERROR_MESSAGE.format(e.statement), e.params, e.orig,
+                                 e.connection_invalidated)
         finally:
             pass
             # self.__session.close()
 
+    @classmethod
+    def bulk_save_to_db(cls, objects: List["AbstractDBObject"], session: Session, batch_size: int = 10000) -> None:
+        """
+        Saves a list of objects to the database. Instead of committing every single object (see
+        :meth:`AbstractDBObject.save_to_db`) the objects are added in batches with one commit per batch.
+
+        :param objects: list of objects to be stored in the database
+        :param session: SQLAlchemy Session handling the connection to the database
+        :param batch_size: number of objects committed at once
+        :return: Nothing
+        :raises IntegrityError: if the commit of a batch fails, the changes of the batch are rolled back
+        :raises TypeError: if session is not of type SQLAlchemy Session
+        :raises ValueError: if batch_size is smaller than 1
+        """
+        _check_session(session)
+
+        batch_size = int(batch_size)
+        if batch_size < 1:
+            raise ValueError("batch_size has to be larger than 0 (is {})!".format(batch_size))
+
+        with _in_bulk():
+            for start in range(0, len(objects), batch_size):
+                session.add_all(objects[start:start + batch_size])
+                try:
+                    session.commit()
+                except IntegrityError:
+                    # rollback the current batch, already committed batches are kept
+                    session.rollback()
+                    raise
+
+    @staticmethod
+    @contextmanager
+    def deferred_commit(session: Session) -> Iterator[None]:
+        """
+        Context manager deferring the commits of :meth:`AbstractDBObject.save_to_db`. Inside the context save_to_db
+        only adds the objects to the session, all changes are committed once when the context is left::
+
+            with AbstractDBObject.deferred_commit(session):
+                for point in points:
+                    point.save_to_db()
+
+        If the block raises an exception, nothing is committed.
+
+        :param session: SQLAlchemy Session handling the connection to the database
+        :return: Nothing
+        :raises IntegrityError: if the final commit fails, all changes are rolled back
+        :raises TypeError: if session is not of type SQLAlchemy Session
+        """
+        _check_session(session)
+
+        with _in_bulk():
+            yield
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                raise
+
     @classmethod
     def delete_from_db(cls, obj: "AbstractDBObject", session: Session):
         """
@@ -264,23 +483,71 @@ class AbstractDBObject(object):
         session.close()
 
     @classmethod
-    def load_all_from_db(cls, session: Session) -> List["AbstractDBObject"]:
+    def _statement(cls, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Returns the select statement stored for this class under key. The statement is built once by factory, values
+        are passed as bound parameters during execution. This way the statement can be reused and SQLAlchemy finds
+        the compiled version in its cache without rebuilding the statement on every call.
+
+        :param key: name of the statement
+        :param factory: function building the statement
+        :return: the cached statement
+        """
+        statement = _statements.get((cls, key))
+        if statement is None:
+            statement = _statements[(cls, key)] = factory()
+        return statement
+
+    @classmethod
+    def _loader_options(cls) -> List:
+        """
+        Returns the loader options, which are used by all loading functions of the class, e.g. to load relationships
+        needed for nearly every object together with the objects. Derived classes can overwrite this function, by
+        default no options are used.
+
+        :return: a list of loader options for :meth:`sqlalchemy.orm.Query.options`
+        """
+        return []
+
+    @classmethod
+    def _eager_options(cls, eager: Tuple[str, ...]) -> List:
+        """
+        Converts a sequence of relationship names into SQLAlchemy selectinload options. Each relationship is loaded
+        with one additional SELECT for all returned objects instead of one SELECT per object.
+
+        :param eager: names of the relationships (or the relationship attributes themselves) to load eagerly
+        :return: a list of loader options for :meth:`sqlalchemy.orm.Query.options`
+        """
+        return [selectinload(getattr(cls, rel) if isinstance(rel, str) else rel) for rel in eager]
+
+    @classmethod
+    def load_all_from_db(cls, session: Session, eager: Tuple[str, ...] = (), stream: bool = False,
+                         limit: int or None = None,
+                         offset: int or None = None) -> List["AbstractDBObject"] or Iterator["AbstractDBObject"]:
         """
         Returns all objects in the database connected to the SQLAlchemy Session session
 
         :param session: represents the database connection as SQLAlchemy Session
         :type session: Session
-        :return: a list of objects
+        :param eager: names of relationships, which should be loaded together with the objects, e.g. ("properties",)
+                      for GeoPoint, ("points",) for Line or ("marker", "logs") for Well
+        :param stream: if True, an iterator is returned, which loads the objects in batches of 1000 rows instead of
+                       loading the whole table at once
+        :param limit: maximal number of returned objects, all objects are returned if None
+        :param offset: number of objects (ordered by id), which are skipped
+        :return: a list of objects or an iterator over the objects, if stream is True
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        result = session.query(cls)
-        result = result.order_by(cls.id).all()
-        for marker in result:
-            marker.session = session
-        return result
+        statement = cls._statement("all", lambda: sq.select(cls).options(*cls._loader_options()).order_by(cls.id))
+        if eager:
+            statement = statement.options(*cls._eager_options(eager))
+        if limit is not None or offset is not None:
+            statement = statement.limit(limit).offset(offset)
+        if stream:
+            return iter(session.execute(statement, execution_options={"yield_per": 1000}).scalars())
+        return session.execute(statement).scalars().all()
 
     @classmethod
     def load_by_id_from_db(cls, _id: int, session: Session) -> "AbstractDBObject":
@@ -291,18 +558,15 @@ class AbstractDBObject(object):
         :param session: represents the database connection as SQLAlchemy Session
         :return: a single object representing the result of the database query
         :raises DatabaseRequestException: Raises DatabaseRequestException if no object was found with this id
-        :raises IntegrityError: Raises IntegrityError if more than one object was found (more than one unique value)
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        try:
-            result = session.query(cls).filter(cls.id == _id).one()
-            result.session = session
-            return result
-        except NoResultFound:
+        # primary key lookup, objects already loaded by the session are returned without a database query
+        result = session.get(cls, _id, options=cls._loader_options())
+        if result is None:
             raise DatabaseRequestException("No result found for ID {}".format(_id))
+        return result
 
     @classmethod
     def load_by_name_from_db(cls, name: str, session: Session) -> List["AbstractDBObject"]:
@@ -314,10 +578,19 @@ class AbstractDBObject(object):
         :return: a list of objects representing the result of the database query
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        result = session.query(cls).filter(cls.name_col == name).order_by(cls.id).all()
-        for obj in result:
-            obj.session = session
+        statement = cls._statement(
+            "by_name", lambda: sq.select(cls).options(*cls._loader_options()).
+            where(cls.name_col == sq.bindparam("name")).order_by(cls.id))
+        result = session.execute(statement, {"name": name}).scalars().all()
         return result
+
+
+@sq.event.listens_for(AbstractDBObject, "load", propagate=True)
+def _set_session_on_load(target: AbstractDBObject, context: Any) -> None:
+    """
+    Stores the loading session in every object created by a database query, so the loaders don't have to set the
+    session for each returned object.
+    """
+    target._AbstractDBObject__session = context.session
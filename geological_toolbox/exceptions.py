@@ -4,7 +4,24 @@ Module providing package wide Exceptions
 """
 
 
-class ArgumentError(Exception):
+class _MessageException(Exception):
+    """
+    Base class of the package exceptions, which keeps the error message in the exception arguments
+
+    :param msg: detailed error message
+    """
+
+    __slots__ = ()
+
+    @property
+    def message(self) -> str:
+        """
+        detailed error message of the exception (read-only)
+        """
+        return str(self.args[0]) if self.args else ""
+
+
+class ArgumentError(_MessageException):
     """
     Should be raised, if a wrong number of arguments are submitted or an other failure inside the arguments are
     recognised.
@@ -12,78 +29,54 @@ class ArgumentError(Exception):
     :param msg: detailed error message
     """
 
-    def __init__(self, msg: str) -> None:
-        self.message = str(msg)
-
-    def __str__(self) -> str:
-        return self.message
+    __slots__ = ()
 
 
-class DatabaseException(Exception):
+class DatabaseException(_MessageException):
     """
     Should be raised, if an unresolved database issue occurred (e.g. more than one value in a unique column)
 
     :param msg: detailed error message
     """
 
-    def __init__(self, msg: str) -> None:
-        self.message = str(msg)
+    __slots__ = ()
 
-    def __str__(self) -> str:
-        return self.message
 
-
-class DatabaseRequestException(Exception):
+class DatabaseRequestException(_MessageException):
     """
     Should be raised, if an error occurs during a database request (e.g. not the expected result)
 
     :param msg: detailed error message
     """
 
-    def __init__(self, msg: str) -> None:
-        self.message = str(msg)
-
-    def __str__(self) -> str:
-        return self.message
+    __slots__ = ()
 
 
-class FaultException(Exception):
+class FaultException(_MessageException):
     """
     Should be raised, if a fault marker causes an interruption
 
     :param msg: detailed error message
     """
 
-    def __init__(self, msg: str) -> None:
-        self.message = str(msg)
+    __slots__ = ()
 
-    def __str__(self) -> str:
-        return self.message
 
-
-class ListOrderException(Exception):
+class ListOrderException(_MessageException):
     """
     Should be raised, if the ordering of a list is wrong (e.g. min values in an extent list after max...)
 
     :param msg: detailed error message
     """
 
-    def __init__(self, msg: str) -> None:
-        self.message = str(msg)
-
-    def __str__(self) -> str:
-        return self.message
+    __slots__ = ()
 
 
-class WellMarkerDepthException(Exception):
+class WellMarkerDepthException(_MessageException):
     """
     Should be raised, if a new well marker should be located deeper than the depth of the well
 
     :param msg: detailed error message
     """
 
-    def __init__(self, msg: str) -> None:
-        self.message = str(msg)
-
-    def __str__(self) -> str:
-        return self.message
+    __slots__ = ()
@@ -3,11 +3,14 @@
 This module hosts the basic AbstractGeoObject class. In declares all basic functions for a GeoObjects
 """
 
+import numpy as np
 import sqlalchemy as sq
+from sqlalchemy.engine import Row
 from sqlalchemy.orm.session import Session
-from typing import List
+from sqlalchemy.sql import Select
+from typing import List, Tuple
 
-from geological_toolbox.db_handler import AbstractDBObject
+from geological_toolbox.db_handler import AbstractDBObject, _check_session
 
 
 class AbstractGeoObject(AbstractDBObject):
@@ -25,8 +28,11 @@ class AbstractGeoObject(AbstractDBObject):
     :return: nothing
     """
 
-    east = sq.Column(sq.FLOAT)
-    north = sq.Column(sq.FLOAT)
+    __slots__ = ()
+
+    # indexed for the extent queries
+    east = sq.Column(sq.FLOAT, index=True)
+    north = sq.Column(sq.FLOAT, index=True)
     alt = sq.Column(sq.FLOAT)
     reference = sq.Column(sq.TEXT, default="")
 
@@ -121,9 +127,22 @@ class AbstractGeoObject(AbstractDBObject):
         """
         self.reference = str(reference)
 
+    @classmethod
+    def _extent_filter(cls, statement: Select) -> Select:
+        """
+        Restricts a select statement to the objects inside an extent and orders the result by id. The extent is passed
+        as bound parameters min_easting, max_easting, min_northing and max_northing during execution.
+
+        :param statement: select statement to be restricted
+        :return: the restricted select statement
+        """
+        return statement.where(cls.east.between(sq.bindparam("min_easting"), sq.bindparam("max_easting")),
+                               cls.north.between(sq.bindparam("min_northing"), sq.bindparam("max_northing"))). \
+            order_by(cls.id)
+
     @classmethod
     def load_in_extent_from_db(cls, session: Session, min_easting: float, max_easting: float, min_northing: float,
-                               max_northing: float) -> List["AbstractGeoObject"]:
+                               max_northing: float, eager: Tuple[str, ...] = ()) -> List["AbstractGeoObject"]:
         """
         Returns all objects inside the given extent in the database connected to the SQLAlchemy Session session.
 
@@ -132,6 +151,8 @@ class AbstractGeoObject(AbstractDBObject):
         :param max_easting: maximal easting of extent
         :param min_northing: minimal northing of extent
         :param max_northing: maximal northing of extent
+        :param eager: names of relationships, which should be loaded together with the objects (see
+                      :meth:`AbstractDBObject.load_all_from_db`)
         :return: a list of objects representing the result of the database query
         :raises ValueError: if one of the extension values is not compatible to type float
         :raises TypeError: if session is not of type SQLAlchemy Session
@@ -141,12 +162,100 @@ class AbstractGeoObject(AbstractDBObject):
         min_northing = float(min_northing)
         max_northing = float(max_northing)
 
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        result = session.query(cls).filter(sq.between(cls.east, min_easting, max_easting)). \
-            filter(sq.between(cls.north, min_northing, max_northing))
-        result = result.order_by(cls.id).all()
-        for obj in result:
-            obj.session = session
+        statement = cls._statement("in_extent",
+                                   lambda: cls._extent_filter(sq.select(cls).options(*cls._loader_options())))
+        if eager:
+            statement = statement.options(*cls._eager_options(eager))
+        result = session.execute(statement, {"min_easting": min_easting, "max_easting": max_easting,
+                                             "min_northing": min_northing, "max_northing": max_northing})
+        result = result.scalars().all()
         return result
+
+    @classmethod
+    def load_in_extent_core(cls, session: Session, min_easting: float, max_easting: float, min_northing: float,
+                            max_northing: float) -> List[Row]:
+        """
+        Returns the id and the coordinates of all objects inside the given extent as lightweight rows
+        (id, east, north, alt). In contrast to :meth:`AbstractGeoObject.load_in_extent_from_db` no ORM objects are
+        created, which makes this function the better choice for read-only access (e.g. drawing or exporting). Use
+        :meth:`AbstractGeoObject.load_in_extent_from_db` if the objects have to be changed.
+
+        :param session: represents the database connection as SQLAlchemy Session
+        :param min_easting: minimal easting of extent
+        :param max_easting: maximal easting of extent
+        :param min_northing: minimal northing of extent
+        :param max_northing: maximal northing of extent
+        :return: a list of rows (id, east, north, alt) ordered by id
+        :raises ValueError: if one of the extension values is not compatible to type float
+        :raises TypeError: if session is not of type SQLAlchemy Session
+        """
+        min_easting = float(min_easting)
+        max_easting = float(max_easting)
+        min_northing = float(min_northing)
+        max_northing = float(max_northing)
+
+        _check_session(session)
+
+        statement = cls._statement("in_extent_core",
+                                   lambda: cls._extent_filter(sq.select(cls.id, cls.east, cls.north, cls.alt)))
+        return session.execute(statement, {"min_easting": min_easting, "max_easting": max_easting,
+                                           "min_northing": min_northing, "max_northing": max_northing}).all()
+
+    @classmethod
+    def load_coords_in_extent(cls, session: Session, min_easting: float, max_easting: float, min_northing: float,
+                              max_northing: float) -> np.ndarray:
+        """
+        Returns the coordinates of all objects inside the given extent as numpy array with the shape (N, 3). Each row
+        contains easting, northing and altitude of one object, the rows are ordered by the object id. Missing values
+        are stored as NaN.
+
+        :param session: represents the database connection as SQLAlchemy Session
+        :param min_easting: minimal easting of extent
+        :param max_easting: maximal easting of extent
+        :param min_northing: minimal northing of extent
+        :param max_northing: maximal northing of extent
+        :return: a float64 array with the shape (N, 3)
+        :raises ValueError: if one of the extension values is not compatible to type float
+        :raises TypeError: if session is not of type SQLAlchemy Session
+        """
+        min_easting = float(min_easting)
+        max_easting = float(max_easting)
+        min_northing = float(min_northing)
+        max_northing = float(max_northing)
+
+        _check_session(session)
+
+        statement = cls._statement("coords_in_extent",
+                                   lambda: cls._extent_filter(sq.select(cls.east, cls.north, cls.alt)))
+        result = session.execute(statement, {"min_easting": min_easting, "max_easting": max_easting,
+                                             "min_northing": min_northing, "max_northing": max_northing})
+        return np.asarray(result.all(), dtype=np.float64).reshape((-1, 3))
+
+    @staticmethod
+    def filter_in_extent(coords: np.ndarray, min_easting: float, max_easting: float, min_northing: float,
+                         max_northing: float) -> np.ndarray:
+        """
+        Returns a boolean mask marking the coordinates inside the given extent, e.g. to refine the result of
+        :meth:`AbstractGeoObject.load_coords_in_extent` without a new database query::
+
+            coords = GeoPoint.load_coords_in_extent(session, 0, 1000, 0, 1000)
+            inner = coords[GeoPoint.filter_in_extent(coords, 250, 750, 250, 750)]
+
+        :param coords: array with the shape (N, 2) or (N, 3) and easting and northing in the first two columns
+        :param min_easting: minimal easting of extent
+        :param max_easting: maximal easting of extent
+        :param min_northing: minimal northing of extent
+        :param max_northing: maximal northing of extent
+        :return: a boolean array with the shape (N,)
+        :raises ValueError: if one of the extension values is not compatible to type float or coords has a wrong shape
+        """
+        coords = np.asarray(coords, dtype=np.float64)
+        if (coords.ndim != 2) or (coords.shape[1] < 2):
+            raise ValueError("coords has to be an array with the shape (N, 2) or (N, 3), not {}!".format(coords.shape))
+
+        east = coords[:, 0]
+        north = coords[:, 1]
+        return (east >= float(min_easting)) & (east <= float(max_easting)) & \
+               (north >= float(min_northing)) & (north <= float(max_northing))
@@ -3,16 +3,16 @@
 Module providing basic geometries (points and lines) for storing geological data in a database.
 """
 
-from typing import List
+from typing import List, Tuple
 
 import sqlalchemy as sq
 from geological_toolbox.constants import float_precision
-from geological_toolbox.db_handler import Base, AbstractDBObject
+from geological_toolbox.db_handler import Base, AbstractDBObject, _check_session
 from geological_toolbox.geo_object import AbstractGeoObject
 from geological_toolbox.properties import Property
 from geological_toolbox.stratigraphy import StratigraphicObject
 from sqlalchemy.ext.orderinglist import ordering_list
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import joinedload, relationship, selectinload
 from sqlalchemy.orm.session import Session
 
 
@@ -138,6 +138,21 @@ class GeoPoint(Base, AbstractGeoObject):
 
         self.properties.append(prop)
 
+    def add_properties(self, props: List[Property]) -> None:
+        """
+        Adds multiple properties to the point at once
+
+        :param props: list of new point properties
+        :return: Nothing
+        :raises TypeError: if one of the properties is not of type Property
+        """
+        props = list(props)
+        for prop in props:
+            if type(prop) is not Property:
+                raise TypeError("property {} is not of type Property!".format(str(prop)))
+
+        self.properties += props
+
     def delete_property(self, prop: Property) -> None:
         """
         Deletes a property from the point
@@ -183,6 +198,24 @@ class GeoPoint(Base, AbstractGeoObject):
                 return prop
         raise ValueError("No property with the name '{}' exists!".format(property_name))
 
+    @classmethod
+    def _loader_options(cls) -> List:
+        """
+        The stratigraphy is loaded by the same query, the properties of all points with one additional query.
+
+        :return: a list of loader options for :meth:`sqlalchemy.orm.Query.options`
+        """
+        return [joinedload(GeoPoint.hor), selectinload(GeoPoint.properties)]
+
+    @classmethod
+    def _without_line(cls) -> sq.sql.ColumnElement:
+        """
+        Returns the condition for points, which are not part of a line
+
+        :return: the SQL condition
+        """
+        return sq.or_(GeoPoint.line_id.is_(None), GeoPoint.line_id == -1)
+
     # overwrite loading method
     @classmethod
     def load_all_without_lines_from_db(cls, session: Session) -> List["GeoPoint"]:
@@ -196,16 +229,12 @@ class GeoPoint(Base, AbstractGeoObject):
         :return: a list of points representing the result of the database query
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        # filter((GeoPoint.line_id is None) or (GeoPoint.line_id == -1) or (GeoPoint.line_id == "")). \
-        result = session.query(GeoPoint). \
-            filter(sq.or_(GeoPoint.line_id == None, GeoPoint.line_id == -1)). \
-            order_by(cls.id).all()
-        for point in result:
-            point.session = session
-        return result
+        statement = cls._statement("all_without_lines",
+                                   lambda: sq.select(GeoPoint).options(*cls._loader_options()).
+                                   where(cls._without_line()).order_by(cls.id))
+        return session.execute(statement).scalars().all()
 
     @classmethod
     def load_by_name_without_lines_from_db(cls, name: str, session: Session) -> List["GeoPoint"]:
@@ -220,16 +249,14 @@ class GeoPoint(Base, AbstractGeoObject):
         :return: a list of GeoPoints representing the result of the database query
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        result = session.query(GeoPoint). \
-            filter(sq.or_(GeoPoint.line_id == None, GeoPoint.line_id == -1)). \
-            filter(cls.name_col == name). \
-            order_by(cls.id).all()
-        for obj in result:
-            obj.session = session
-        return result
+        statement = cls._statement(
+            "by_name_without_lines",
+            lambda: sq.select(GeoPoint).options(*cls._loader_options()).
+            where(cls._without_line(), cls.name_col == sq.bindparam("name")).
+            order_by(cls.id))
+        return session.execute(statement, {"name": name}).scalars().all()
 
     @classmethod
     def load_in_extent_without_lines_from_db(cls, session: Session, min_easting: float, max_easting: float,
@@ -254,16 +281,14 @@ class GeoPoint(Base, AbstractGeoObject):
         min_northing = float(min_northing)
         max_northing = float(max_northing)
 
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        result = session.query(GeoPoint).filter(sq.between(GeoPoint.east, min_easting, max_easting)). \
-            filter(sq.between(GeoPoint.north, min_northing, max_northing)). \
-            filter(sq.or_(GeoPoint.line_id == None, GeoPoint.line_id == -1)). \
-            order_by(cls.id).all()
-        for point in result:
-            point.session = session
-        return result
+        statement = cls._statement("in_extent_without_lines",
+                                   lambda: cls._extent_filter(sq.select(GeoPoint).options(*cls._loader_options()).
+                                                              where(cls._without_line())))
+        return session.execute(statement, {"min_easting": min_easting, "max_easting": max_easting,
+                                           "min_northing": min_northing, "max_northing": max_northing}). \
+            scalars().all()
 
 
 class Line(Base, AbstractDBObject):
@@ -527,7 +552,7 @@ class Line(Base, AbstractDBObject):
 
     @classmethod
     def load_in_extent_from_db(cls, session: Session, min_easting: float, max_easting: float, min_northing: float,
-                               max_northing: float) -> List["Line"]:
+                               max_northing: float, eager: Tuple[str, ...] = ()) -> List["Line"]:
         """
         Returns all lines with at least on point inside the given extent in the database connected to the SQLAlchemy
         Session session. Overloads the
@@ -539,6 +564,7 @@ class Line(Base, AbstractDBObject):
         :param min_northing: minimal northing of extent
         :param max_northing: maximal northing of extent
         :param session: represents the database connection as SQLAlchemy Session
+        :param eager: names of relationships, which should be loaded together with the lines, e.g. ("points",)
         :return: a list of lines representing the result of the database query
         :raises ValueError: if one of the extension values is not compatible to type float
         :raises TypeError: if session is not of type SQLAlchemy Session
@@ -548,25 +574,17 @@ class Line(Base, AbstractDBObject):
         min_northing = float(min_northing)
         max_northing = float(max_northing)
 
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
-
-        # select the points with a line_id that are located inside the extent
-        # -> result will be a list of tuples with only a single line-id value
-        # -> convert this list to a set in order to remove doubled values
-
-        points = set(
-            [x[0] for x in session.query(GeoPoint.line_id).
-                filter(GeoPoint.line_id != -1).
-                filter(sq.between(GeoPoint.east, min_easting, max_easting)).
-                filter(sq.between(GeoPoint.north, min_northing, max_northing)).all()
-             ])
-
-        # return line with points in extend
-        # to speed up the process, test if points (len > 0) exist in extent first
-        if len(points) == 0:
-            return []
-        result = session.query(Line).filter(Line.id.in_(points)).order_by(cls.id).all()
-        for line in result:
-            line.session = session
-        return result
+        _check_session(session)
+
+        # select the lines with at least one point inside the extent, the line ids of the points are selected by a
+        # subquery of the same statement
+        statement = cls._statement(
+            "in_extent",
+            lambda: sq.select(Line).where(Line.id.in_(
+                GeoPoint._extent_filter(sq.select(GeoPoint.line_id).where(GeoPoint.line_id != -1)).order_by(None))).
+            order_by(cls.id))
+        if eager:
+            statement = statement.options(*cls._eager_options(eager))
+        return session.execute(statement, {"min_easting": min_easting, "max_easting": max_easting,
+                                           "min_northing": min_northing, "max_northing": max_northing}). \
+            scalars().all()
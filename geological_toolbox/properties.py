@@ -22,6 +22,21 @@ class PropertyTypes(Enum):
     """Representing a float"""
 
 
+_NATIVE_TYPES = {
+    PropertyTypes.STRING.name: (str,),
+    PropertyTypes.INT.name: (int,),
+    PropertyTypes.FLOAT.name: (float, int)
+}
+"""python types, which can be stored for each property type without a conversion test"""
+
+_CONVERTERS = {
+    PropertyTypes.STRING.name: str,
+    PropertyTypes.INT.name: int,
+    PropertyTypes.FLOAT.name: float
+}
+"""conversion function of the stored string value for each property type"""
+
+
 class Property(Base, AbstractLogClass):
     """
     This class represents logging information for wells.
@@ -63,13 +78,10 @@ class Property(Base, AbstractLogClass):
         :return: converted property value
         """
 
-        if self.property_type == PropertyTypes.STRING:
-            return str(value)
+        # one dictionary lookup with the stored type name instead of comparing PropertyTypes members
+        converter = _CONVERTERS[self.prop_type]
         try:
-            if self.property_type == PropertyTypes.INT:
-                return int(value)
-            if self.property_type == PropertyTypes.FLOAT:
-                return float(value)
+            return converter(value)
         except ValueError:
             return None
 
@@ -114,8 +126,10 @@ class Property(Base, AbstractLogClass):
         """
         see getter
         """
-        if self.__check_value(str(value)):
-            self.prop_value = str(value)
+        text = str(value)
+        # values of the matching python type need no conversion test
+        if type(value) in _NATIVE_TYPES.get(self.prop_type, ()) or self.__check_value(text):
+            self.prop_value = text
         else:
             raise ValueError("Cannot convert property values [{}] to specified type {}".
                              format(value, self.property_type.name))
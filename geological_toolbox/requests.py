@@ -2,16 +2,24 @@
 This module hosts the class Requests, which provides functionality for special (geo-)database requests.
 """
 
+import numpy as np
 import sqlalchemy as sq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import groupby
+from operator import attrgetter
+from sqlalchemy.orm import aliased, joinedload
 from sqlalchemy.orm.session import Session
-from typing import List, Tuple
+from sqlalchemy.sql import Select
+from typing import Dict, Iterable, List, Sequence, Tuple
 
+from geological_toolbox.db_handler import _check_session
 from geological_toolbox.exceptions import DatabaseException, DatabaseRequestException, FaultException, \
     ListOrderException
 from geological_toolbox.geometries import GeoPoint
 from geological_toolbox.properties import Property, PropertyTypes
 from geological_toolbox.stratigraphy import StratigraphicObject
-from geological_toolbox.wells import WellMarker
+from geological_toolbox.wells import Well, WellMarker
 
 
 class Requests:
@@ -19,6 +27,16 @@ class Requests:
     The class Requests, which provides functionality for special (geo-)database requests.
     """
 
+    marker_batch_size = 1000
+    """number of WellMarker fetched at once by :meth:`Requests.well_markers_to_thickness`"""
+
+    use_marker_self_join = False
+    """
+    If True, :meth:`Requests.well_markers_to_thickness` selects the marker with a self join of the well_marker table
+    (SELECT DISTINCT ...) instead of a correlated EXISTS subquery. Which variant is faster depends on the database
+    system and the size of the well_marker table.
+    """
+
     def __init__(self):
         # type: () -> None
         """
@@ -29,43 +47,76 @@ class Requests:
         pass
 
     @staticmethod
-    def check_extent(extent: List[float]) -> None:
+    def check_extent(extent: Sequence[float] or np.ndarray or None) -> List[float] or None:
         """
         checks, if the given extent has the right format
 
         :param extent: value to be checked
-        :type extent:
-        :return: Nothing
-        :raises TypeError: if extent is not a list
+        :type extent: list, tuple or numpy.ndarray
+        :return: the extent as list of floats (a given list is also converted in place), None if extent is None
+        :raises TypeError: if extent is not a list, tuple or numpy array
         :raises ValueError: if on list element is not compatible to float or number of elements is not 4
         :raises ListOrderException: if the ordering of the extent list [min_easting, max_easting, min_northing,
                 max_northing] is wrong.
         """
         if extent is None:
-            return
-
-        if not isinstance(extent, List):
-            raise TypeError("extent is not an instance of List()!")
-        if len(extent) != 4:
+            return None
+
+        if not isinstance(extent, (list, tuple, np.ndarray)):
+            raise TypeError("extent is not an instance of list, tuple or numpy.ndarray!")
+        try:
+            # float64 arrays are used without a copy
+            values = np.asarray(extent, dtype=np.float64)
+        except (TypeError, ValueError) as e:
+            raise ValueError("At least on extent element cannot be converted to float!\n{}".format(e)) from e
+        if values.shape != (4,):
             raise ValueError("Number of extension list elements is not 4!")
-        for i in range(len(extent)):
-            try:
-                extent[i] = float(extent[i])
-            except ValueError as e:
-                raise ValueError("At least on extent element cannot be converted to float!\n{}".format(e))
-        if extent[0] > extent[1]:
+        if values[0] > values[1]:
             raise ListOrderException("min easting > max easting")
-        if extent[2] > extent[3]:
+        if values[2] > values[3]:
             raise ListOrderException("min northing > max northing")
 
+        result = values.tolist()
+        # only lists with non-float elements have to be converted in place
+        if isinstance(extent, list) and any(type(value) is not float for value in extent):
+            extent[:] = result
+        return result
+
+    @staticmethod
+    def fault_depths(session: Session, well_ids: Iterable[int] or Select,
+                     fault_name: str = "Fault") -> Dict[int, List[float]]:
+        """
+        Loads the depths of all fault marker of the given wells with a single query
+
+        :param session: current SQLAlchemy session
+        :param well_ids: ids of the wells, either as iterable or as SELECT statement returning the ids
+        :param fault_name: name of fault stratigraphic unit (default: "Fault")
+        :return: dictionary well_id -> sorted list of fault depths, wells without faults are missing
+        """
+        if not isinstance(well_ids, Select):
+            well_ids = list(well_ids)
+
+        faults = session.query(WellMarker.well_id, WellMarker.drill_depth). \
+            join(StratigraphicObject, WellMarker.horizon_id == StratigraphicObject.id). \
+            filter(StratigraphicObject.unit_name == fault_name). \
+            filter(WellMarker.well_id.in_(well_ids)). \
+            order_by(WellMarker.well_id, WellMarker.drill_depth)
+
+        result = defaultdict(list)
+        for well_id, depth in faults:
+            result[well_id].append(depth)
+        return dict(result)
+
     @staticmethod
-    def create_thickness_point(sorted_dict: dict, well_id: int, marker_1: int, marker_2: int, session: Session,
+    def create_thickness_point(markers: List[WellMarker], well_id: int, marker_1: int, marker_2: int, session: Session,
                                use_faulted: bool = False, fault_name: str = "",
-                               add_properties: Tuple = tuple()) -> GeoPoint:
+                               add_properties: Tuple = tuple(),
+                               faults_by_well: Dict[int, List[float]] or None = None) -> GeoPoint:
         """
         Generate a new GeoPoint with thickness property from 2 well marker
 
-        :param sorted_dict: dictionary containing well_id / WellMarker data
+        :param markers: WellMarker of the well sorted by depth (a dictionary well_id -> WellMarker list is also
+               accepted). Except marker_1, the entries only need a depth attribute.
         :param well_id: current well_id
         :param marker_1: id of marker 1
         :param marker_2: id of marker 2
@@ -73,38 +124,102 @@ class Requests:
         :param use_faulted: should faulted sequence be included?
         :param fault_name: name of fault stratigraphic unit (default: "Fault")
         :param add_properties: Adds the properties to the GeoPoint. Format for each property: (value, type, name, unit)
+        :param faults_by_well: sorted fault depths per well as returned by :meth:`Requests.fault_depths`. If None,
+               the faults of the well are loaded from the database.
         :return: new GeoPoint Object
         :raises FaultException: if a fault is inside the section and use_faulted is False
         :raises ValueError: if a property in the add_property tuple has less than 3 entries
         """
 
-        min_depth = sorted_dict[well_id][marker_1].depth
-        max_depth = sorted_dict[well_id][marker_2].depth
+        if isinstance(markers, dict):
+            markers = markers[well_id]
 
-        faults = session.query(WellMarker).join(StratigraphicObject). \
-            filter(WellMarker.horizon_id == StratigraphicObject.id). \
-            filter(StratigraphicObject.unit_name == fault_name). \
-            filter(WellMarker.well_id == well_id)
-        if min_depth > max_depth:
-            faults = faults.filter(sq.between(WellMarker.drill_depth, max_depth, min_depth))
-        else:
-            faults = faults.filter(sq.between(WellMarker.drill_depth, min_depth, max_depth))
-        if (faults.count() > 0) and (use_faulted is False):
+        min_depth = markers[marker_1].depth
+        max_depth = markers[marker_2].depth
+
+        if faults_by_well is None:
+            faults_by_well = Requests.fault_depths(session, (well_id,), fault_name)
+
+        # count the faults inside the section
+        depths = faults_by_well.get(well_id, [])
+        low, high = (max_depth, min_depth) if (min_depth > max_depth) else (min_depth, max_depth)
+        fault_count = bisect_right(depths, high) - bisect_left(depths, low)
+        if (fault_count > 0) and (use_faulted is False):
             raise FaultException("Fault inside section")
 
-        point = sorted_dict[well_id][marker_1].to_geopoint()
-        thickness = Property(max_depth - min_depth, PropertyTypes.FLOAT, "thickness", "m", session)
-        point.add_property(thickness)
+        props = [Property(max_depth - min_depth, PropertyTypes.FLOAT, "thickness", "m", session)]
         if use_faulted:
-            faulted = Property(faults.count(), PropertyTypes.INT, "faulted", "count", session)
-            point.add_property(faulted)
+            props.append(Property(fault_count, PropertyTypes.INT, "faulted", "count", session))
         for prop in add_properties:
             if len(prop) < 4:
                 raise ValueError("property tuple has less than 4 entries!")
-            new_property = Property(prop[0], PropertyTypes[prop[1]], prop[2], prop[3], session)
-            point.add_property(new_property)
+            props.append(Property(prop[0], PropertyTypes[prop[1]], prop[2], prop[3], session))
+
+        point = markers[marker_1].to_geopoint()
+        point.add_properties(props)
         return point
 
+    @staticmethod
+    def _marker_statements(use_self_join: bool, use_extent: bool) -> Tuple[Select, Select]:
+        """
+        Returns the select statements of :meth:`Requests.well_markers_to_thickness` for all WellMarker with the unit
+        names marker_1 or marker_2 in wells, which have both marker. The statements are built once per variant, the
+        unit names and the extent are passed as bound parameters (marker_1, marker_2, min_easting, max_easting,
+        min_northing, max_northing) during execution.
+
+        :param use_self_join: select the second marker with a self join instead of an EXISTS subquery
+        :param use_extent: restrict the statement to the wells inside an extent
+        :return: the cached statements (ids of the selected wells, rows (id, well_id, depth, unit_name) of the
+                 selected WellMarker ordered by well_id and drill_depth)
+        """
+        key = "thickness_{}_{}".format("join" if use_self_join else "exists", "extent" if use_extent else "all")
+
+        def build() -> Select:
+            # second marker of the same well with the other unit name
+            other_marker = aliased(WellMarker)
+            other_unit = aliased(StratigraphicObject)
+            units = (sq.bindparam("marker_1"), sq.bindparam("marker_2"))
+            other_condition = sq.and_(other_marker.horizon_id == other_unit.id,
+                                      other_unit.unit_name.in_(units),
+                                      other_marker.well_id == WellMarker.well_id,
+                                      other_unit.unit_name != StratigraphicObject.unit_name)
+
+            statement = sq.select(WellMarker). \
+                join(StratigraphicObject, WellMarker.horizon_id == StratigraphicObject.id)
+            if use_self_join:
+                statement = statement.join(other_marker, other_marker.well_id == WellMarker.well_id). \
+                    join(other_unit, other_marker.horizon_id == other_unit.id). \
+                    where(other_condition). \
+                    distinct()
+            else:
+                statement = statement.where(sq.exists().where(other_condition))
+            if use_extent:
+                statement = statement.join(Well, WellMarker.well_id == Well.id). \
+                    where(Well.east.between(sq.bindparam("min_easting"), sq.bindparam("max_easting")),
+                          Well.north.between(sq.bindparam("min_northing"), sq.bindparam("max_northing")))
+            return statement.where(StratigraphicObject.unit_name.in_(units))
+
+        statement = WellMarker._statement(key, build)
+        well_ids = WellMarker._statement(key + "_well_ids",
+                                         lambda: statement.with_only_columns(WellMarker.well_id).distinct())
+        markers = WellMarker._statement(key + "_marker", lambda: statement.with_only_columns(
+            WellMarker.id, WellMarker.well_id, WellMarker.drill_depth.label("depth"), StratigraphicObject.unit_name).
+                                        order_by(WellMarker.well_id, WellMarker.drill_depth))
+        return well_ids, markers
+
+    @staticmethod
+    def _section_marker_statement() -> Select:
+        """
+        Returns the select statement loading the WellMarker with the ids passed as expanding bound parameter "ids"
+        together with their well and horizon.
+
+        :return: the cached select statement
+        """
+        return WellMarker._statement(
+            "thickness_section_marker",
+            lambda: sq.select(WellMarker).where(WellMarker.id.in_(sq.bindparam("ids", expanding=True))).
+            options(joinedload(WellMarker.hor), joinedload(WellMarker.well)))
+
     @staticmethod
     def well_markers_to_thickness(session: Session, marker_1: str, marker_2: str, summarise_multiple: bool = False,
                                   extent: Tuple[int, int, int, int] or None = None, use_faulted: bool = False,
@@ -149,91 +264,66 @@ class Requests:
                 AND st1.unit_name <> st2.unit_name
             )
             ORDER BY wm1.well_id,wm1.drill_depth
+
+        If :attr:`Requests.use_marker_self_join` is True, the EXISTS subquery is replaced by a self join:
+
+        .. code-block:: sql
+            :linenos:
+
+            SELECT DISTINCT wm1.* FROM well_marker wm1
+            JOIN stratigraphy st1
+            ON wm1.horizon_id = st1.id
+            JOIN well_marker wm2
+            ON wm2.well_id = wm1.well_id
+            JOIN stratigraphy st2
+            ON wm2.horizon_id = st2.id
+            WHERE st1.unit_name IN ("mu", "so")
+            AND st2.unit_name IN ("mu", "so")
+            AND st1.unit_name <> st2.unit_name
+            ORDER BY wm1.well_id,wm1.drill_depth
         """
-        if not isinstance(session, Session):
-            raise TypeError("session is not of type SQLAlchemy Session")
+        _check_session(session)
 
         if marker_1 == marker_2:
             raise AttributeError("marker_1 and marker_2 cannot be equal!")
 
+        extent = Requests.check_extent(extent)
+
+        well_ids, markers_statement = Requests._marker_statements(Requests.use_marker_self_join, extent is not None)
+        params = {"marker_1": marker_1, "marker_2": marker_2}
         if extent is not None:
-            Requests.check_extent(extent)
+            params.update(min_easting=extent[0], max_easting=extent[1], min_northing=extent[2], max_northing=extent[3])
 
-        result = session.query(WellMarker)
-        if extent is None:
-            statement = sq.text("SELECT wm1.* FROM well_marker wm1 " +
-                                "JOIN stratigraphy st1 ON wm1.horizon_id = st1.id " +
-                                "WHERE st1.unit_name IN (:marker1, :marker2) " +
-                                "AND EXISTS " +
-                                "( SELECT 1 FROM well_marker wm2 JOIN stratigraphy st2 ON wm2.horizon_id = st2.id " +
-                                "WHERE st2.unit_name IN (:marker1, :marker2) AND wm1.well_id = wm2.well_id " +
-                                "AND st1.unit_name <> st2.unit_name) ORDER BY wm1.well_id,wm1.drill_depth")
-            result = result.from_statement(statement). \
-                params(marker1=marker_1, marker2=marker_2). \
-                all()
-        else:
-            statement = sq.text("SELECT wm1.* FROM well_marker wm1 " +
-                                "JOIN wells ON wm1.well_id = wells.id " +
-                                "JOIN stratigraphy st1 ON wm1.horizon_id = st1.id " +
-                                "WHERE wells.east BETWEEN :east_min AND :east_max " +
-                                "AND wells.north BETWEEN :north_min AND :north_max " +
-                                "AND st1.unit_name IN (:marker1, :marker2)" +
-                                "AND EXISTS " +
-                                "( SELECT 1 FROM well_marker wm2 JOIN stratigraphy st2 ON wm2.horizon_id = st2.id " +
-                                "WHERE st2.unit_name IN (:marker1, :marker2) AND wm1.well_id = wm2.well_id " +
-                                "AND st1.unit_name <> st2.unit_name) ORDER BY wm1.well_id,wm1.drill_depth")
-            result = result.from_statement(statement). \
-                params(marker1=marker_1, marker2=marker_2, east_min=extent[0], east_max=extent[1], north_min=extent[2],
-                       north_max=extent[3]). \
-                all()
-
-        # first: sort by well_id for simpler multiple marker check
-        sorted_dict = dict()
-        for i in range(len(result)):
-            if result[i].well_id not in sorted_dict:
-                sorted_dict[result[i].well_id] = list()
-            sorted_dict[result[i].well_id].append(result[i])
-
-        del result
+        # all fault marker of the selected wells at once
+        faults_by_well = Requests.fault_depths(session, well_ids.params(params), fault_name)
 
-        # generate the resulting list of GeoPoints
-        geopoints = list()
-        for well_id in sorted_dict:
-            if len(sorted_dict[well_id]) < 2:
+        # the marker are streamed and processed well by well (the result is ordered by well_id)
+        result = session.execute(markers_statement, params,
+                                 execution_options={"yield_per": Requests.marker_batch_size})
+
+        # first: select the sections (first marker, last marker, additional properties) of each well, the marker
+        # are lightweight rows (id, well_id, depth, unit_name) without ORM overhead
+        label = "summarised" if summarise_multiple else "multiple marker"
+        single_section = ((0, "INT", label, "bool"),)
+        multiple_sections = ((1, "INT", label, "bool"),)
+
+        sections = list()
+        for well_id, markers in groupby(result, key=attrgetter("well_id")):
+            markers = list(markers)
+            if len(markers) < 2:
                 raise DatabaseException("Not enough well marker in dictionary")
-            if len(sorted_dict[well_id]) == 2:
-                sorted_dict[well_id][0].session = session
-                try:
-                    if summarise_multiple:
-                        point = Requests.create_thickness_point(
-                            sorted_dict, well_id, 0, 1, session, use_faulted, fault_name,
-                            ((0, "INT", "summarised", "bool"),))
-                        geopoints.append(point)
-                    else:
-                        point = Requests.create_thickness_point(
-                            sorted_dict, well_id, 0, 1, session, use_faulted, fault_name,
-                            ((0, "INT", "multiple marker", "bool"),))
-                        geopoints.append(point)
-                # FaultException -> do nothing except catching the exception
-                except FaultException:
-                    continue
-                # don't test anything else for this well_id
+            if len(markers) == 2:
+                # exactly one section, no search necessary
+                sections.append((markers[0], markers[1], single_section))
                 continue
 
             # last case: more than 2 values found:
+            names = [marker.unit_name for marker in markers]
             if summarise_multiple:
-                first_index = -1
-                last_index = -1
-                for i in range(len(sorted_dict[well_id])):
-                    if sorted_dict[well_id][i].horizon.unit_name == marker_1:
-                        first_index = i
-                        break
-                for j in reversed(range(len(sorted_dict[well_id]))):
-                    if sorted_dict[well_id][j].horizon.unit_name == marker_2:
-                        last_index = j
-                        break
-
-                if (first_index == -1) or (last_index == -1):
+                try:
+                    first_index = names.index(marker_1)
+                    last_index = len(names) - 1 - names[::-1].index(marker_2)
+                except ValueError:
                     raise DatabaseRequestException("Didn't find two different markers. Shouldn't be possible. " +
                                                    "Please excuse this error and forward it to me.")
 
@@ -241,35 +331,36 @@ class Requests:
                 if last_index < first_index:
                     continue
 
-                try:
-                    sorted_dict[well_id][first_index].session = session
-                    point = Requests.create_thickness_point(
-                        sorted_dict, well_id, first_index, last_index, session, use_faulted, fault_name,
-                        ((1, "INT", "summarised", "bool"),))
-                    geopoints.append(point)
-                # FaultException -> do nothing except catching the exception
-                except FaultException:
-                    continue
+                sections.append((markers[first_index], markers[last_index], multiple_sections))
 
                 # finished summarise section -> continue to avoid second round without summarise
                 continue
             # don't summarise
             first_index = -1
-            for index in range(len(sorted_dict[well_id])):
-                if sorted_dict[well_id][index].horizon.unit_name == marker_1:
+            for index, name in enumerate(names):
+                if name == marker_1:
                     first_index = index
-                elif (first_index != -1) and (sorted_dict[well_id][index].horizon.unit_name == marker_2):
-                    try:
-                        sorted_dict[well_id][first_index].session = session
-                        point = Requests.create_thickness_point(
-                            sorted_dict, well_id, first_index, index, session, use_faulted, fault_name,
-                            ((1, "INT", "multiple marker", "bool"),))
-                        geopoints.append(point)
-                    # FaultException -> do nothing except catching the exception
-                    except FaultException:
-                        continue
-                    finally:
-                        first_index = -1
+                elif (first_index != -1) and (name == marker_2):
+                    sections.append((markers[first_index], markers[index], multiple_sections))
+                    first_index = -1
+
+        # second: load the WellMarker objects of the first section marker (together with well and horizon) and
+        # generate the resulting list of GeoPoints
+        geopoints = list()
+        for start in range(0, len(sections), Requests.marker_batch_size):
+            batch = sections[start:start + Requests.marker_batch_size]
+            loaded = session.execute(Requests._section_marker_statement(),
+                                     {"ids": [first.id for first, _, _ in batch]}).scalars()
+            loaded = {marker.id: marker for marker in loaded}
+            for first, last, add_properties in batch:
+                try:
+                    point = Requests.create_thickness_point(
+                        [loaded[first.id], last], first.well_id, 0, 1, session, use_faulted, fault_name,
+                        add_properties, faults_by_well)
+                    geopoints.append(point)
+                # FaultException -> do nothing except catching the exception
+                except FaultException:
+                    continue
 
         return geopoints
 
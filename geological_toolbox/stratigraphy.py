@@ -4,12 +4,69 @@ This module provides a class for storing stratigraphical information in a databa
 """
 
 import sqlalchemy as sq
+from collections import OrderedDict
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.session import Session
-from typing import List
+from typing import Iterator, List, Tuple
+from weakref import WeakKeyDictionary
 
 from geological_toolbox.exceptions import DatabaseException
-from geological_toolbox.db_handler import Base, AbstractDBObject
+from geological_toolbox.db_handler import Base, AbstractDBObject, _check_session
+
+
+_UNIT_CACHE_SIZE = 256
+"""
+Maximum number of stratigraphic units cached per session
+"""
+
+_unit_cache: "WeakKeyDictionary[Session, OrderedDict]" = WeakKeyDictionary()
+"""
+Stratigraphic units by name for each session, filled by the name lookups of StratigraphicObject
+"""
+
+
+def _get_cached_unit(session: Session, name: str) -> "StratigraphicObject" or None:
+    """
+    Returns the cached stratigraphic unit with the given name or None. A cached unit is only returned, if it is still
+    stored in the database (persistent), belongs to the session and its name wasn't changed in the meantime. Otherwise
+    the cache entry is removed.
+
+    :param session: session of the unit
+    :param name: name of the stratigraphic unit
+    :return: the cached unit or None
+    """
+    units = _unit_cache.get(session)
+    if units is None:
+        return None
+    unit = units.get(name)
+    if unit is None:
+        return None
+
+    state = sq.inspect(unit)
+    if state.persistent and (state.session is session) and (unit.unit_name == name):
+        units.move_to_end(name)
+        return unit
+
+    del units[name]
+    return None
+
+
+def _cache_unit(session: Session, unit: "StratigraphicObject") -> None:
+    """
+    Stores a loaded stratigraphic unit in the cache of the session. The least recently used unit is dropped, if the
+    cache is full.
+
+    :param session: session of the unit
+    :param unit: stratigraphic unit loaded from the database
+    :return: Nothing
+    """
+    units = _unit_cache.get(session)
+    if units is None:
+        units = _unit_cache[session] = OrderedDict()
+    units[unit.unit_name] = unit
+    units.move_to_end(unit.unit_name)
+    if len(units) > _UNIT_CACHE_SIZE:
+        units.popitem(last=False)
 
 
 class StratigraphicObject(Base, AbstractDBObject):
@@ -34,12 +91,13 @@ class StratigraphicObject(Base, AbstractDBObject):
         """
         AbstractDBObject.__init__(self, *args, **kwargs)
 
-        try:
-            age = int(age)
-        except ValueError as e:
-            raise ValueError("Cannot convert age to int:\n{}".format(str(e)))
+        if type(age) is not float:
+            try:
+                age = float(age)
+            except ValueError as e:
+                raise ValueError("Cannot convert age to float:\n{}".format(str(e)))
 
-        self.unit_name = str(name)
+        self.unit_name = name if (type(name) is str) else str(name)
         self.age = -1 if (age < 0) else age
 
     def __repr__(self) -> str:
@@ -100,51 +158,100 @@ class StratigraphicObject(Base, AbstractDBObject):
         :raises ValueError: if age is not compatible to float
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        try:
-            age = float(age)
-        except ValueError as e:
-            raise ValueError("Cannot convert age to float:\n{}".format(str(e)))
+        if type(age) is not float:
+            try:
+                age = float(age)
+            except ValueError as e:
+                raise ValueError("Cannot convert age to float:\n{}".format(str(e)))
 
         if age < 0:
             age = -1
 
-        # check if horizon exists (unique name)
-        result = session.query(StratigraphicObject).filter(StratigraphicObject.unit_name == name)
-        if result.count() == 0:  # no result found -> create new stratigraphic unit
+        # check if horizon exists (unique name), two rows are enough to detect a duplicate
+        result = _get_cached_unit(session, name)
+        result = [result] if (result is not None) else \
+            session.query(StratigraphicObject).filter(StratigraphicObject.unit_name == name).limit(2).all()
+        if len(result) == 0:  # no result found -> create new stratigraphic unit
             return cls(name, age, session=session)
-        if result.count() == 1:  # one result found -> stratigr. unit exists in db -> return and possibly update
-            result = result.one()
-            result.session = session
+        if len(result) == 1:  # one result found -> stratigr. unit exists in db -> return and possibly update
+            result = result[0]
+            _cache_unit(session, result)
             if update:  # change age value
                 result.horizon_age = age
             return result
 
         # more than one result? => heavy failure, statigraphic_name should be unique => DatabaseException
-        # for res in result.all():
-        #     print(res)
-        raise DatabaseException(
-            "More than one ({}) horizon with the same statigraphic_name: {}! Database error!".format(result.count(), name))
+        raise DatabaseException("More than one horizon with the same statigraphic_name: {}! Database error!".
+                                format(name))
+
+    @classmethod
+    def bulk_save_to_db(cls, objects: List["StratigraphicObject"], session: Session, batch_size: int = 10000) -> None:
+        """
+        Saves a list of stratigraphic units to the database in one transaction per batch (see
+        :meth:`AbstractDBObject.bulk_save_to_db`). As the unit name is unique, units with a name already stored in the
+        database are skipped. Their names are looked up with one query per batch instead of one
+        :meth:`StratigraphicObject.init_stratigraphy` call per unit. Of multiple new units with the same name only the
+        first one is stored.
+
+        :param objects: list of stratigraphic units to be stored in the database
+        :param session: SQLAlchemy Session handling the connection to the database
+        :param batch_size: number of units checked and committed at once
+        :return: Nothing
+        :raises IntegrityError: if the commit of a batch fails, the changes of the batch are rolled back
+        :raises TypeError: if session is not of type SQLAlchemy Session
+        :raises ValueError: if batch_size is smaller than 1
+        """
+        _check_session(session)
+
+        batch_size = int(batch_size)
+        if batch_size < 1:
+            raise ValueError("batch_size has to be larger than 0 (is {})!".format(batch_size))
+
+        seen = set()
+        for start in range(0, len(objects), batch_size):
+            batch = objects[start:start + batch_size]
+            names = {unit.unit_name for unit in batch}
+            seen.update(name for (name,) in session.query(cls.unit_name).filter(cls.unit_name.in_(names)))
+
+            new_units = list()
+            for unit in batch:
+                if unit.unit_name not in seen:
+                    seen.add(unit.unit_name)
+                    new_units.append(unit)
+            super().bulk_save_to_db(new_units, session, batch_size)
+            for unit in new_units:
+                _cache_unit(session, unit)
 
     # load units from db
     @classmethod
-    def load_all_from_db(cls, session: Session) -> List["StratigraphicObject"]:
+    def load_all_from_db(cls, session: Session, eager: Tuple[str, ...] = (), stream: bool = False,
+                         limit: int or None = None,
+                         offset: int or None = None) -> List["StratigraphicObject"] or Iterator["StratigraphicObject"]:
         """
         Returns all stratigraphic units stored in the database connected to the SQLAlchemy Session session
 
         :param session: represents the database connection as SQLAlchemy Session
-        :return: a list of stratigraphic units representing the result of the database query
+        :param eager: names of relationships, which should be loaded together with the stratigraphic units
+        :param stream: if True, an iterator is returned, which loads the units in batches of 1000 rows
+        :param limit: maximal number of returned units, all units are returned if None
+        :param offset: number of units (ordered by id), which are skipped
+        :return: a list of stratigraphic units representing the result of the database query or an iterator over the
+                 units, if stream is True
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
-
-        result = session.query(cls).all()
-        for horizon in result:  # set session value
-            horizon.session = session
-        return result
+        _check_session(session)
+
+        result = session.query(cls)
+        if eager:
+            result = result.options(*cls._eager_options(eager))
+        if limit is not None or offset is not None:
+            result = result.order_by(cls.id).limit(limit).offset(offset)
+        # the session is set by the load event of AbstractDBObject
+        if stream:
+            return iter(result.yield_per(1000))
+        return result.all()
 
     @classmethod
     def load_by_stratigraphic_name_from_db(cls, name: str, session: Session) -> "StratigraphicObject" or None:
@@ -157,19 +264,22 @@ class StratigraphicObject(Base, AbstractDBObject):
         :raises DatabaseException: if more than one result was found (name is an unique value)
         :raises TypeError: if session is not of type SQLAlchemy Session
         """
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
+
+        result = _get_cached_unit(session, name)
+        if result is not None:
+            return result
 
-        result = session.query(cls).filter(cls.unit_name == name)
-        if result.count() == 0:
+        result = session.query(cls).filter(cls.unit_name == name).limit(2).all()
+        if len(result) == 0:
             return None
-        if result.count() == 1:
-            result = result.one()
-            result.session = session
+        if len(result) == 1:
+            result = result[0]
+            _cache_unit(session, result)
             return result
 
-        raise DatabaseException("More than one ({}) horizon with the same statigraphic_name: {}! Database error!".
-                                format(result.count(), name))
+        raise DatabaseException("More than one horizon with the same statigraphic_name: {}! Database error!".
+                                format(name))
 
     @classmethod
     def load_by_age_from_db(cls, min_age: float, max_age: float, session: Session) -> List["StratigraphicObject"]:
@@ -186,10 +296,7 @@ class StratigraphicObject(Base, AbstractDBObject):
         """
         min_age = float(min_age)
         max_age = float(max_age)
-        if not isinstance(session, Session):
-            raise TypeError("'session' is not of type SQLAlchemy Session!")
+        _check_session(session)
 
-        result = session.query(cls).filter(sq.between(cls.age, min_age, max_age)).all()
-        for horizon in result:
-            horizon.session = session
-        return result
+        # the session is set by the load event of AbstractDBObject
+        return session.query(cls).filter(sq.between(cls.age, min_age, max_age)).all()
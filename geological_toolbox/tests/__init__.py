@@ -2,3 +2,109 @@
 """
 Modules and classes to run unittest on the "Resources" modules
 """
+
+import sqlalchemy as sq
+from contextlib import contextmanager
+from sqlalchemy.pool import StaticPool
+from typing import Iterator, List
+
+from geological_toolbox.db_handler import DBHandler, ToolboxSession
+
+
+@contextmanager
+def count_queries(bind, selects_only=False):
+    # type: (object, bool) -> Iterator[List[str]]
+    """
+    Records the SQL statements executed on an engine or connection inside the with block
+
+    :param bind: engine or connection, which executes the statements
+    :param selects_only: if True, only SELECT statements are recorded
+    :return: list of the executed statements, filled while the with block is running
+    """
+    statements = list()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if not selects_only or statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    sq.event.listen(bind, "before_cursor_execute", count)
+    try:
+        yield statements
+    finally:
+        sq.event.remove(bind, "before_cursor_execute", count)
+
+
+class InMemoryDatabaseTestData(object):
+    """
+    Mixin for test classes, which fill one in-memory database once in setUpClass and share it between all tests. Use
+    it together with :class:`RollbackTestMixin` for tests, which change the database.
+    """
+
+    @classmethod
+    def create_database(cls):
+        # type: () -> None
+        """
+        Initialise the in-memory database of the test class as cls.handler. All sessions and threads use its single
+        connection.
+
+        :return: None
+        """
+        cls.handler = DBHandler(connection="sqlite://", echo=False, poolclass=StaticPool,
+                                connect_args={"check_same_thread": False})
+        # temporary b-trees of the queries (e.g. ORDER BY) are kept in memory, too
+        with cls.handler.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA temp_store=MEMORY")
+            connection.exec_driver_sql("PRAGMA synchronous=OFF")
+            # the sqlite3 module doesn't begin a transaction before a SAVEPOINT, which breaks the nested transactions
+            # of RollbackTestMixin -> its transaction handling is switched off and BEGIN is emitted explicitly
+            connection.connection.dbapi_connection.isolation_level = None
+        sq.event.listen(cls.handler.engine, "begin", lambda connection: connection.exec_driver_sql("BEGIN"))
+
+    @classmethod
+    def tearDownClass(cls):
+        # type: () -> None
+        """
+        Close the database connection after all testruns
+
+        :return: Nothing
+        """
+        cls.handler.close_session()
+        cls.handler.engine.dispose()
+
+
+class RollbackTestMixin(object):
+    """
+    Mixin for test classes of :class:`InMemoryDatabaseTestData`, which rolls back the changes of each test
+    """
+
+    autoflush = True
+    """autoflush setting of the session of each test"""
+
+    def setUp(self):
+        # type: () -> None
+        """
+        Runs each test inside a transaction, which is rolled back afterwards. Commits of the test only release a
+        SAVEPOINT, which is started again after each commit or rollback.
+
+        :return: None
+        """
+        self.connection = self.handler.engine.connect()
+        self.transaction = self.connection.begin()
+        self.session = ToolboxSession(bind=self.connection, autoflush=self.autoflush, expire_on_commit=False)
+        self.session.begin_nested()
+
+        @sq.event.listens_for(self.session, "after_transaction_end")
+        def restart_savepoint(session, transaction):
+            if transaction.nested and not transaction.parent.nested:
+                session.begin_nested()
+
+    def tearDown(self):
+        # type: () -> None
+        """
+        Rolls back all changes of the test and closes the session
+
+        :return: Nothing
+        """
+        self.session.close()
+        self.transaction.rollback()
+        self.connection.close()
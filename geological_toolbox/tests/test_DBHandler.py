@@ -0,0 +1,128 @@
+# -*- coding: UTF-8 -*-
+"""
+This is a test module for the geological_toolbox.db_handler.DBHandler class using unittest
+"""
+
+import gc
+import os
+import sqlalchemy as sq
+import tempfile
+import unittest
+import uuid
+import weakref
+
+from geological_toolbox.db_handler import DBHandler
+
+
+class TestDBHandlerClass(unittest.TestCase):
+    """
+    This is a unittest class for the geological_toolbox.db_handler.DBHandler class
+    """
+
+    def setUp(self):
+        # type: () -> None
+        """
+        Initialise a database file in a temporary directory
+
+        :return: None
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.sqlite")
+        self.handler = DBHandler(connection="sqlite:///" + self.path, echo=False)
+        self.session = self.handler.get_session()
+
+    def test_migration(self):
+        # type: () -> None
+        """
+        Test the schema creation of a new database file
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        self.assertTrue(self.handler.check_current_head(), "Database schema is not up to date")
+        # a second handler for the same file finds the schema up to date
+        self.assertTrue(DBHandler(connection="sqlite:///" + self.path, echo=False).check_current_head(),
+                        "Database schema is not up to date")
+
+        indexes = [x[0] for x in self.session.execute(sq.text("SELECT name FROM sqlite_master WHERE type='index'"))]
+        for index in ("ix_geopoints_east", "ix_geopoints_north", "ix_wells_east", "ix_wells_north",
+                      "ix_wm_well_horizon", "ix_wm_well_depth", "coordinate_index", "ix_wells_depth",
+                      "ix_well_marker_horizon"):
+            self.assertIn(index, indexes, "Index {} is missing".format(index))
+
+        tables = [x[0] for x in self.session.execute(sq.text("SELECT name FROM sqlite_master WHERE type='table'"))]
+        self.assertIn("wells_rtree", tables, "R*Tree index of the wells is missing")
+
+    def test_pragma(self):
+        # type: () -> None
+        """
+        Test the connection settings of a SQLite database file
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        journal_mode = self.session.execute(sq.text("PRAGMA journal_mode")).scalar()
+        self.assertEqual(journal_mode, "wal", "Wrong journal mode ({}). Should be {}.".format(journal_mode, "wal"))
+
+    def test_shared_memory_database(self):
+        # type: () -> None
+        """
+        Test an in-memory database shared by two handlers
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        connection = "sqlite:///file:test_{}?mode=memory&cache=shared&uri=true".format(uuid.uuid4().hex)
+        first = DBHandler(connection=connection, echo=False)
+        second = DBHandler(connection=connection, echo=False)
+        try:
+            first.get_session().execute(sq.text("INSERT INTO stratigraphy (unit_name, age) VALUES ('ku', 1)"))
+            first.get_session().commit()
+            self.assertEqual(second.get_session().execute(sq.text("SELECT unit_name FROM stratigraphy")).scalar(),
+                             "ku")
+            tables = [x[0] for x in
+                      second.get_session().execute(sq.text("SELECT name FROM sqlite_master WHERE type='table'"))]
+            self.assertNotIn("alembic_version", tables, "In-memory databases should not be migrated")
+            self.assertIn("wells_rtree", tables, "R*Tree index of the wells is missing")
+        finally:
+            first.close_session()
+            second.close_session()
+
+    def test_engine_release(self):
+        # type: () -> None
+        """
+        Test the release of the shared engines of database files
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        handler = DBHandler(connection="sqlite:///" + self.path, echo=False)
+        self.assertIs(handler.engine, self.handler.engine, "Handlers of the same file should share the engine")
+
+        handler.dispose()
+        self.assertIsNot(DBHandler(connection="sqlite:///" + self.path, echo=False).engine, self.handler.engine,
+                         "Disposed engine is still shared")
+        # the disposed engine opens new connections for the remaining handlers
+        self.assertEqual(self.session.execute(sq.text("SELECT 1")).scalar(), 1)
+
+        handler = DBHandler(connection="sqlite:///" + os.path.join(self.directory.name, "other.sqlite"), echo=False)
+        handler.get_session().execute(sq.text("SELECT 1"))
+        handler.close_session()
+        engine = weakref.ref(handler.engine)
+        handler = None
+        gc.collect()
+        self.assertIsNone(engine(), "Engine isn't released with the last handler")
+
+    def tearDown(self):
+        # type: () -> None
+        """
+        Close session and remove the database file
+
+        :return: Nothing
+        """
+        self.handler.close_session()
+        self.directory.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
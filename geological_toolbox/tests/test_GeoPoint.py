@@ -3,129 +3,162 @@
 This is a test module for the Resources.Geometries.GeoPoint class using unittest
 """
 
-import math
-import sys
+import itertools
 import unittest
+from sqlalchemy.orm import Session
 
-from geological_toolbox.db_handler import DBHandler
 from geological_toolbox.geometries import GeoPoint, Line
 from geological_toolbox.properties import Property, PropertyTypes
 from geological_toolbox.stratigraphy import StratigraphicObject
 from geological_toolbox.constants import float_precision
+from geological_toolbox.tests import InMemoryDatabaseTestData, RollbackTestMixin, count_queries
 
 
-class TestGeoPointClass(unittest.TestCase):
+class GeoPointTestData(InMemoryDatabaseTestData):
     """
-    This is a unittest class for the Resources.Geometries.GeoPoint class
+    Test data of the Resources.Geometries.GeoPoint tests, which is stored once per test class in an in-memory database
     """
 
-    def setUp(self):
+    # test data, added to the database once for all tests (see setUpClass)
+    points = (
+        {
+            "coords": (1234134, 5465462, 123),
+            "horizon": "mu",
+            "age": 3,
+            "name": "",
+            "update": False
+        },
+        {
+            "coords": (1254367, 5443636, 156),
+            "horizon": "so",
+            "age": 23,
+            "name": "",
+            "update": False
+        },
+        {
+            "coords": (1265469, 5467929, None),
+            "horizon": "sm",
+            "age": 5,
+            "name": "point set",
+            "update": False
+        },
+        {
+            "coords": (1273456, 5449672, 101),
+            "horizon": "mu",
+            "age": 26,
+            "name": "point set",
+            "update": True
+        }
+    )
+
+    lines = (
+        {
+            "closed": False,
+            "horizon": "mu",
+            "age": 3,
+            "update": False,
+            "points": ((1204067.0548148106, 634617.5980860253),
+                       (1204067.0548148106, 620742.1035724243),
+                       (1215167.4504256917, 620742.1035724243),
+                       (1215167.4504256917, 634617.5980860253),
+                       (1204067.0548148106, 634617.5980860253)),
+            "name": "Line_1"
+        }, {
+            "closed": True,
+            "horizon": "so",
+            "age": 2,
+            "update": True,
+            "points": ((1179553.6811741155, 647105.5431482664),
+                       (1179553.6811741155, 626292.3013778647),
+                       (1194354.20865529, 626292.3013778647),
+                       (1194354.20865529, 647105.5431482664)),
+            "name": "Line_2"
+        }, {
+            "closed": False,
+            "horizon": "mm",
+            "age": 4,
+            "update": True,
+            "points": ((1179091.1646903288, 712782.8838459781),
+                       (1161053.0218226474, 667456.2684348812),
+                       (1214704.933941905, 641092.8288590391),
+                       (1228580.428455506, 682719.3123998424),
+                       (1218405.0658121984, 721108.1805541387)),
+            "name": "Line_3"
+        }, {
+            "closed": False,
+            "horizon": "mo",
+            "age": 5,
+            "update": True,
+            "points": ((1149490.1097279799, 691044.6091080031),
+                       (1149490.1097279799, 648030.5761158396),
+                       (1191579.1097525698, 648030.5761158396),
+                       (1149490.1097279799, 648030.5761158396),
+                       (1191579.1097525698, 691044.6091080031),
+                       (1149490.1097279799, 691044.6091080031)),
+            "name": "Line_2"
+        }
+    )
+
+    @classmethod
+    def setUpClass(cls):
         # type: () -> None
         """
-        Initialise a temporary database connection for all test cases and fill the database with test data
+        Initialise a temporary database connection for all test cases and fill the database with test data once for
+        the whole test class
 
         :return: None
         """
-        # initialise a in-memory sqlite database
-        self.handler = DBHandler(connection="sqlite://", echo=False)
-        self.session = self.handler.get_session()
-
-        # add test data to the database
-        self.points = [
-            {
-                "coords": (1234134, 5465462, 123),
-                "horizon": "mu",
-                "age": 3,
-                "name": "",
-                "update": False
-            },
-            {
-                "coords": (1254367, 5443636, 156),
-                "horizon": "so",
-                "age": 23,
-                "name": "",
-                "update": False
-            },
-            {
-                "coords": (1265469, 5467929, None),
-                "horizon": "sm",
-                "age": 5,
-                "name": "point set",
-                "update": False
-            },
-            {
-                "coords": (1273456, 5449672, 101),
-                "horizon": "mu",
-                "age": 26,
-                "name": "point set",
-                "update": True
-            }
-        ]
-
-        self.lines = [
-            {
-                "closed": False,
-                "horizon": "mu",
-                "age": 3,
-                "update": False,
-                "points": ((1204067.0548148106, 634617.5980860253),
-                           (1204067.0548148106, 620742.1035724243),
-                           (1215167.4504256917, 620742.1035724243),
-                           (1215167.4504256917, 634617.5980860253),
-                           (1204067.0548148106, 634617.5980860253)),
-                "name": "Line_1"
-            }, {
-                "closed": True,
-                "horizon": "so",
-                "age": 2,
-                "update": True,
-                "points": ((1179553.6811741155, 647105.5431482664),
-                           (1179553.6811741155, 626292.3013778647),
-                           (1194354.20865529, 626292.3013778647),
-                           (1194354.20865529, 647105.5431482664)),
-                "name": "Line_2"
-            }, {
-                "closed": False,
-                "horizon": "mm",
-                "age": 4,
-                "update": True,
-                "points": ((1179091.1646903288, 712782.8838459781),
-                           (1161053.0218226474, 667456.2684348812),
-                           (1214704.933941905, 641092.8288590391),
-                           (1228580.428455506, 682719.3123998424),
-                           (1218405.0658121984, 721108.1805541387)),
-                "name": "Line_3"
-            }, {
-                "closed": False,
-                "horizon": "mo",
-                "age": 5,
-                "update": True,
-                "points": ((1149490.1097279799, 691044.6091080031),
-                           (1149490.1097279799, 648030.5761158396),
-                           (1191579.1097525698, 648030.5761158396),
-                           (1149490.1097279799, 648030.5761158396),
-                           (1191579.1097525698, 691044.6091080031),
-                           (1149490.1097279799, 691044.6091080031)),
-                "name": "Line_2"
-            }
-        ]
-
-        for point in self.points:
-            strat = StratigraphicObject.init_stratigraphy(self.session, point["horizon"], point["age"], point["update"])
-            new_point = GeoPoint(strat, False if (point["coords"][2] is None) else True, "", point["coords"][0],
-                                 point["coords"][1], 0 if (point["coords"][2] is None) else point["coords"][2],
-                                 self.session, point["name"], "")
-            new_point.save_to_db()
-
-        for line in self.lines:
-            points = list()
-            for point in line["points"]:
-                points.append(GeoPoint(None, False, "", point[0], point[1], 0, self.session, line["name"], ""))
-            new_line = Line(line["closed"],
-                            StratigraphicObject.init_stratigraphy(self.session, line["horizon"], line["age"],
-                                                                  line["update"]),
-                            points, self.session, line["name"], "")
-            new_line.save_to_db()
+        cls.create_database()
+        session = cls.handler.get_session()
+
+        # the database is empty, the stratigraphic units are created up front instead of one init_stratigraphy query
+        # per fixture (same result: the first fixture creates the unit, later ones with update set the age)
+        horizons = dict()
+        for fixture in itertools.chain(cls.points, cls.lines):
+            unit = horizons.get(fixture["horizon"])
+            if unit is None:
+                horizons[fixture["horizon"]] = StratigraphicObject(fixture["horizon"], fixture["age"], session=session)
+            elif fixture["update"]:
+                unit.horizon_age = fixture["age"]
+
+        # all points and lines are committed at once
+        with GeoPoint.deferred_commit(session):
+            for point in cls.points:
+                strat = horizons[point["horizon"]]
+                new_point = GeoPoint(strat, False if (point["coords"][2] is None) else True, "", point["coords"][0],
+                                     point["coords"][1], 0 if (point["coords"][2] is None) else point["coords"][2],
+                                     session, point["name"], "")
+                new_point.save_to_db()
+
+            for line in cls.lines:
+                points = list()
+                for point in line["points"]:
+                    points.append(GeoPoint(None, False, "", point[0], point[1], 0, session, line["name"], ""))
+                new_line = Line(line["closed"], horizons[line["horizon"]], points, session, line["name"], "")
+                new_line.save_to_db()
+
+        cls.handler.close_session()
+
+        # 2 points have been automatically deleted and the lines closed
+        cls._expected_point_count = len(cls.points) + sum(len(line["points"]) for line in cls.lines) - 2
+
+
+class TestGeoPointReadOnly(GeoPointTestData, unittest.TestCase):
+    """
+    This is a unittest class for the Resources.Geometries.GeoPoint class with all tests, which don't change the
+    database. The tests share one session.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # type: () -> None
+        """
+        Initialise the test database and the session of all tests
+
+        :return: None
+        """
+        super().setUpClass()
+        cls.session = cls.handler.get_session()
 
     def test_init(self):
         # type: () -> None
@@ -136,20 +169,13 @@ class TestGeoPointClass(unittest.TestCase):
         :raises AssertionError: Raises AssertionError if a test fails
         """
 
-        pnts = len(self.points)
-        for line in self.lines:
-            pnts += len(line["points"])
-
-        # 2 points will be automatically deleted and the lines will be closed
-        pnts -= 2
-
-        points = self.session.query(GeoPoint)
-        count_points = points.count()
-        points = points.all()
+        pnts = self._expected_point_count
+        points = self.session.query(GeoPoint).all()
+        count_points = len(points)
         stored_horizons = self.session.query(StratigraphicObject).all()
         stored_horizons = [x.statigraphic_name for x in stored_horizons]
         # expected number of horizons
-        horizons = set([x["horizon"] for x in self.lines] + [x["horizon"] for x in self.points])
+        horizons = {x["horizon"] for x in itertools.chain(self.lines, self.points)}
 
         # for point in points:
         #	print(str(point))
@@ -158,12 +184,8 @@ class TestGeoPointClass(unittest.TestCase):
                          "Number of points {} doesn't match the number of stored database points {}!".
                          format(count_points, pnts))
 
-        if sys.version_info[0] == 2:
-            self.assertItemsEqual(horizons, stored_horizons, "Horizons doesn't match.\nDatabase: {}\nShould be: {}".
-                                  format(stored_horizons, horizons))
-        else:
-            self.assertCountEqual(horizons, stored_horizons, "Horizons doesn't match.\nDatabase: {}\nShould be: {}".
-                                  format(stored_horizons, horizons))
+        self.assertCountEqual(horizons, stored_horizons, "Horizons doesn't match.\nDatabase: {}\nShould be: {}".
+                              format(stored_horizons, horizons))
         self.assertEqual(points[0].id, 1, "Wrong ID {} for first point. Should be {}".
                          format(points[0].id, 1))
         self.assertEqual(points[0].horizon.statigraphic_name, "mu",
@@ -185,117 +207,173 @@ class TestGeoPointClass(unittest.TestCase):
         :raises AssertionError: Raises AssertionError if a test fails
         """
 
-        # /1/ load all from database
-        points = GeoPoint.load_all_from_db(self.session)
-        pnts_count = len(self.points)
-        for line in self.lines:
-            pnts_count += len(line["points"])
-
-        # 2 points have been automatically deleted and the lines will be closed
-        pnts_count -= 2
-        self.assertEqual(len(points), pnts_count,
-                         "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
-        self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
-        self.assertTrue(math.fabs(float(points[-1].easting) - 1191579.1097525698) < float_precision,
-                        "Wrong easting difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].easting), 1191579.1097525698,
-                               math.fabs(float(points[-1].easting) - 1191579.1097525698), float_precision))
-        self.assertTrue(math.fabs(float(points[-1].northing) - 691044.6091080031) < float_precision,
-                        "Wrong northing difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].northing), 691044.6091080031,
-                               math.fabs(float(points[-1].northing) - 691044.6091080031), float_precision))
-        del points
+        # the result is kept to check the results of the other loading functions against it
+        all_points = GeoPoint.load_all_from_db(self.session)
+
+        with self.subTest(step="/1/ load all from database"):
+            points = all_points
+            pnts_count = self._expected_point_count
+            self.assertEqual(len(points), pnts_count,
+                             "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
+            self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
+            self.assertAlmostEqual(points[-1].easting, 1191579.1097525698, delta=float_precision, msg="Wrong easting")
+            self.assertAlmostEqual(points[-1].northing, 691044.6091080031, delta=float_precision, msg="Wrong northing")
+
+            # limited loading
+            self.assertEqual(GeoPoint.load_all_from_db(self.session, limit=1), points[:1], "Wrong first point")
+            self.assertEqual(GeoPoint.load_all_from_db(self.session, offset=pnts_count - 1), points[-1:],
+                             "Wrong last point")
+            self.assertEqual(GeoPoint.load_all_from_db(self.session, limit=3, offset=2), points[2:5],
+                             "Wrong slice of points")
+
+            # eager loading of relationships
+            self.session.expire_all()
+            points = GeoPoint.load_all_from_db(self.session, eager=("properties",))
+            self.assertEqual(len(points), pnts_count,
+                             "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
+            for point in points:
+                self.assertIn("properties", point.__dict__, "Properties of point {} are not loaded".format(point.id))
+
+            # streamed loading
+            points = GeoPoint.load_all_from_db(self.session, stream=True)
+            self.assertFalse(isinstance(points, list), "Streamed result should not be a list")
+            self.assertEqual([point.id for point in points], list(range(1, pnts_count + 1)),
+                             "Streamed points are not ordered by id")
+
+            points = GeoPoint.load_all_without_lines_from_db(self.session)
+            self.assertEqual(points, [point for point in all_points if point.line_id in (None, -1)],
+                             "Loaded points differ from the points without a line")
+            pnts_count = len(self.points)  # only points which doesn"t belong to a line are loaded
+            self.assertEqual(len(points), pnts_count,
+                             "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
+            self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
+            self.assertAlmostEqual(points[-1].easting, 1273456, delta=float_precision, msg="Wrong easting")
+            self.assertAlmostEqual(points[-1].northing, 5449672, delta=float_precision, msg="Wrong northing")
+            self.assertEqual(points[-1].horizon.statigraphic_name, "mu",
+                             "Wrong horizon ({}). Should be {}.".format(points[-1].horizon.statigraphic_name, "mu"))
+
+        with self.subTest(step="/2/ load by name"):
+            points = GeoPoint.load_by_name_from_db("", self.session)
+            self.assertEqual(points, [point for point in all_points if point.name == ""],
+                             "Loaded points differ from the points with an empty name")
+
+            pnts_count = len(self.points)
+            # Added line name as points set name, so we have to comment the line points out...
+            # for line in self.lines:
+            #    pnts_count += len(line["points"])
+
+            # 2 points will be automatically deleted and the lines will be closed
+            # pnts_count -= 2
+
+            # 2 points have another name (obviously they have a name)
+            pnts_count -= 2
+
+            self.assertEqual(len(points), pnts_count,
+                             "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
+            self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
+            self.assertAlmostEqual(points[-1].easting, 1254367, delta=float_precision, msg="Wrong easting")
+            self.assertAlmostEqual(points[-1].northing, 5443636, delta=float_precision, msg="Wrong northing")
+
+            points = GeoPoint.load_by_name_without_lines_from_db("", self.session)
+            self.assertEqual(points, [point for point in all_points
+                                      if point.name == "" and point.line_id in (None, -1)],
+                             "Loaded points differ from the points without a line and with an empty name")
+
+            pnts_count = len(self.points)
+            # 2 points have another name (obviously they have a name)
+            pnts_count -= 2
+
+            self.assertEqual(len(points), pnts_count,
+                             "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
+            self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
+            self.assertAlmostEqual(points[-1].easting, 1254367, delta=float_precision, msg="Wrong easting")
+            self.assertAlmostEqual(points[-1].northing, 5443636, delta=float_precision, msg="Wrong northing")
+            self.assertEqual(points[-1].horizon.statigraphic_name, "so",
+                             "Wrong horizon ({}). Should be {}.".format(points[-1].horizon.statigraphic_name, "so"))
+
+        with self.subTest(step="/3/ load points in given extent"):
+            # x -> 1174000 - 1200000
+            # y ->  613500 -  651000
+            # should return points of 2 lines with line-ids 2 (all points) and 4 (1 point)
+            points = GeoPoint.load_in_extent_from_db(self.session, 1174000, 1200000, 613500, 651000)
+            self.assertEqual(points, [point for point in all_points if 1174000 <= point.easting <= 1200000 and
+                                      613500 <= point.northing <= 651000],
+                             "Loaded points differ from the points inside the extent")
+
+            self.assertEqual(len(points), 5, "Wrong number of points ({}), should be {}".format(len(points), 5))
+
+            self.assertAlmostEqual(points[0].easting, 1179553.6811741155, delta=float_precision, msg="Wrong easting")
+            self.assertAlmostEqual(points[0].northing, 647105.5431482664, delta=float_precision, msg="Wrong northing")
+            self.assertEqual(points[0].horizon.statigraphic_name, "so",
+                             "Wrong horizon ({}). Should be {}.".format(points[-1].horizon.statigraphic_name, "so"))
+
+            # core query returns the same points as plain rows
+            rows = GeoPoint.load_in_extent_core(self.session, 1174000, 1200000, 613500, 651000)
+            self.assertEqual([row.id for row in rows], [point.id for point in points],
+                             "Core query returns different points than the ORM query")
+            self.assertEqual(tuple(rows[0]), (points[0].id, points[0].easting, points[0].northing, points[0].altitude),
+                             "Wrong row content ({})".format(tuple(rows[0])))
+
+            coords = GeoPoint.load_coords_in_extent(self.session, 1174000, 1200000, 613500, 651000)
+            self.assertEqual(coords.shape, (5, 3), "Wrong array shape ({}), should be {}".format(coords.shape, (5, 3)))
+            self.assertAlmostEqual(coords[0, 0], 1179553.6811741155, delta=float_precision, msg="Wrong easting")
+            self.assertEqual(GeoPoint.load_coords_in_extent(self.session, 0, 1, 0, 1).shape, (0, 3),
+                             "Empty extent should return an empty array")
+
+            mask = GeoPoint.filter_in_extent(coords, 1174000, 1185000, 613500, 651000)
+            self.assertEqual(int(mask.sum()), 2, "Wrong number of points ({}), should be {}".format(int(mask.sum()), 2))
+            self.assertRaises(ValueError, GeoPoint.filter_in_extent, coords[:, 0], 0, 1, 0, 1)
+
+            points = GeoPoint.load_in_extent_without_lines_from_db(self.session, 0, 1, 0, 1)
+            self.assertEqual(len(points), 0, "Wrong number of points ({}), should be {}".format(len(points), 0))
+
+    def test_session_of_loaded_points(self):
+        # type: () -> None
+        """
+        Test that loaded points are bound to the session which loaded them
 
-        points = GeoPoint.load_all_without_lines_from_db(self.session)
-        pnts_count = len(self.points)  # only points which doesn"t belong to a line are loaded
-        self.assertEqual(len(points), pnts_count,
-                         "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
-        self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
-        self.assertTrue(math.fabs(float(points[-1].easting) - 1273456) < float_precision,
-                        "Wrong easting difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].easting), 1273456,
-                               math.fabs(float(points[-1].easting) - 1273456), float_precision))
-        self.assertTrue(math.fabs(float(points[-1].northing) - 5449672) < float_precision,
-                        "Wrong northing difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].northing), 5449672,
-                               math.fabs(float(points[-1].northing) - 5449672), float_precision))
-        self.assertEqual(points[-1].horizon.statigraphic_name, "mu",
-                         "Wrong horizon ({}). Should be {}.".format(points[-1].horizon.statigraphic_name, "mu"))
-        del points
-
-        # /2/ load by name
-        points = GeoPoint.load_by_name_from_db("", self.session)
-
-        pnts_count = len(self.points)
-        # Added line name as points set name, so we have to comment the line points out...
-        # for line in self.lines:
-        #    pnts_count += len(line["points"])
-
-        # 2 points will be automatically deleted and the lines will be closed
-        # pnts_count -= 2
-
-        # 2 points have another name (obviously they have a name)
-        pnts_count -= 2
-
-        self.assertEqual(len(points), pnts_count,
-                         "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
-        self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
-        self.assertTrue(math.fabs(float(points[-1].easting) - 1254367) < float_precision,
-                        "Wrong easting difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].easting), 1254367,
-                               math.fabs(float(points[-1].easting) - 1254367), float_precision))
-        self.assertTrue(math.fabs(float(points[-1].northing) - 5443636) < float_precision,
-                        "Wrong northing difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].northing), 5443636,
-                               math.fabs(float(points[-1].northing) - 5443636), float_precision))
-        del points
-
-        points = GeoPoint.load_by_name_without_lines_from_db("", self.session)
-
-        pnts_count = len(self.points)
-        # 2 points have another name (obviously they have a name)
-        pnts_count -= 2
-
-        self.assertEqual(len(points), pnts_count,
-                         "Wrong point count ({}). Should be {}.".format(len(points), pnts_count))
-        self.assertEqual(points[0].id, 1, "First point should have id {}, but has {}.".format(1, points[0].id))
-        self.assertTrue(math.fabs(float(points[-1].easting) - 1254367) < float_precision,
-                        "Wrong easting difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].easting), 1254367,
-                               math.fabs(float(points[-1].easting) - 1254367), float_precision))
-        self.assertTrue(math.fabs(float(points[-1].northing) - 5443636) < float_precision,
-                        "Wrong northing difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[-1].northing), 5443636,
-                               math.fabs(float(points[-1].northing) - 5443636), float_precision))
-        self.assertEqual(points[-1].horizon.statigraphic_name, "so",
-                         "Wrong horizon ({}). Should be {}.".format(points[-1].horizon.statigraphic_name, "so"))
-        del points
-
-        # /3/ load points in given extent
-        # x -> 1174000 - 1200000
-        # y ->  613500 -  651000
-        # should return points of 2 lines with line-ids 2 (all points) and 4 (1 point)
-        points = GeoPoint.load_in_extent_from_db(self.session, 1174000, 1200000, 613500, 651000)
-
-        self.assertEqual(len(points), 5, "Wrong number of points ({}), should be {}".format(len(points), 5))
-
-        self.assertTrue(math.fabs(float(points[0].easting) - 1179553.6811741155) < float_precision,
-                        "Wrong easting difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[0].easting), 1179553.6811741155,
-                               math.fabs(float(points[0].easting) - 1179553.6811741155), float_precision))
-        self.assertTrue(math.fabs(float(points[0].northing) - 647105.5431482664) < float_precision,
-                        "Wrong northing difference to large ( |{} - {}| = {} > {}).".
-                        format(float(points[0].northing), 647105.5431482664,
-                               math.fabs(float(points[0].northing) - 647105.5431482664), float_precision))
-        self.assertEqual(points[0].horizon.statigraphic_name, "so",
-                         "Wrong horizon ({}). Should be {}.".format(points[-1].horizon.statigraphic_name, "so"))
-
-        del points
-
-        points = GeoPoint.load_in_extent_without_lines_from_db(self.session, 0, 1, 0, 1)
-        self.assertEqual(len(points), 0, "Wrong number of points ({}), should be {}".format(len(points), 0))
-
-        del points
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        # the in-memory database has a single connection, the transaction of the shared session is finished first
+        self.session.rollback()
+        session = Session(bind=self.handler.engine)
+        points = GeoPoint.load_all_from_db(session)
+        for point in points:
+            self.assertIs(point.session, session, "Point {} has a wrong session".format(point.id))
+        self.assertIs(points[0].horizon.session, session, "Lazy loaded horizon has a wrong session")
+        session.close()
+
+    def test_eager_loading(self):
+        # type: () -> None
+        """
+        Test that the horizons and properties of loaded points don't need further queries
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        self.session.rollback()
+        session = Session(bind=self.handler.engine)
+        try:
+            with count_queries(self.handler.engine, selects_only=True) as statements:
+                points = GeoPoint.load_all_from_db(session)
+                self.assertEqual(len(statements), 2, "Points, horizons and properties need two queries")
+                for point in points:
+                    point.horizon
+                    point.has_property("test prop")
+                self.assertEqual(len(statements), 2, "Accessing horizons and properties needs further queries")
+        finally:
+            session.close()
+
+
+class TestGeoPointClass(RollbackTestMixin, GeoPointTestData, unittest.TestCase):
+    """
+    This is a unittest class for the Resources.Geometries.GeoPoint class with all tests, which change the database.
+    The changes are rolled back after each test.
+    """
+
+    # changes are written by the commits of save_to_db, queries don't flush
+    autoflush = False
 
     def test_setter_and_getter(self):
         # type: () -> None
@@ -320,7 +398,6 @@ class TestGeoPointClass(unittest.TestCase):
         for point in points:
             point.save_to_db()
 
-        del points
         points = GeoPoint.load_all_without_lines_from_db(self.session)
         self.assertEqual(len(points), len(self.points),
                          "Wrong point length ({}). Should be {}.".format(len(points), len(self.points)))
@@ -338,22 +415,29 @@ class TestGeoPointClass(unittest.TestCase):
         self.assertEqual(points[1].altitude, 0,
                          "Wrong altitude value ({}). Should be {}.".format(points[1].altitude, 0))
 
+        # the coordinate properties follow direct column changes
+        points[0].east = 5
+        self.assertEqual(points[0].easting, 5,
+                         "Wrong easting value after column change ({}). Should be {}.".format(points[0].easting, 5))
+        self.session.rollback()
+        self.assertEqual(points[0].easting, 1,
+                         "Wrong easting value after rollback ({}). Should be {}.".format(points[0].easting, 1))
+
     def test_add_and_delete_properties(self):
         # type: () -> None
         """
-        Test the add_property and delete_property function
+        Test the add_property, add_properties and delete_property function
 
         :return: Nothing
         :raises AssertionError: Raises AssertionError if a test fails
         """
-        point = GeoPoint.load_all_from_db(self.session)[0]
-        point.add_property(Property(0, PropertyTypes.INT, "test prop", "test unit", self.session))
-        point.add_property(Property(0, PropertyTypes.INT, "test prop 2", "test unit 2", self.session))
+        point = GeoPoint.load_all_from_db(self.session, limit=1)[0]
+        point.add_properties([Property(0, PropertyTypes.INT, "test prop", "test unit", self.session),
+                              Property(0, PropertyTypes.INT, "test prop 2", "test unit 2", self.session)])
 
         self.assertRaises(TypeError, point.add_property, "string")
-        del point
 
-        point = GeoPoint.load_all_from_db(self.session)[0]
+        point = GeoPoint.load_all_from_db(self.session, limit=1)[0]
         self.assertEqual(2, len(point.properties))
         self.assertEqual("test prop", point.properties[0].property_name)
         self.assertEqual("test prop 2", point.properties[1].property_name)
@@ -370,21 +454,21 @@ class TestGeoPointClass(unittest.TestCase):
         self.assertEqual("test prop 2", point.properties[0].property_name)
         self.assertEqual("test unit 2", point.properties[0].property_unit)
 
-        del point
-
-        point = GeoPoint.load_all_from_db(self.session)[0]
+        point = GeoPoint.load_all_from_db(self.session, limit=1)[0]
         self.assertEqual(1, len(point.properties))
         self.assertEqual("test prop 2", point.properties[0].property_name)
         self.assertEqual("test unit 2", point.properties[0].property_unit)
 
-    def tearDown(self):
-        # type: () -> None
-        """
-        Close session after testruns
+        point.add_properties([Property(1, PropertyTypes.INT, "test prop 3", "test unit 3", self.session),
+                              Property(2.5, PropertyTypes.FLOAT, "test prop 4", "test unit 4", self.session)])
+        self.assertRaises(TypeError, point.add_properties, [Property(3, PropertyTypes.INT, "test prop 5", "",
+                                                                     self.session), "string"])
+        self.assertEqual(3, len(point.properties), "properties are added although one of them has a wrong type")
+        point.save_to_db()
 
-        :return: Nothing
-        """
-        self.handler.close_last_session()
+        point = GeoPoint.load_all_from_db(self.session, limit=1)[0]
+        self.assertEqual(["test prop 2", "test prop 3", "test prop 4"], [x.property_name for x in point.properties])
+        self.assertEqual(2.5, point.get_property("test prop 4").property_value)
 
 
 if __name__ == "__main__":
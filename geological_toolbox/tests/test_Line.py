@@ -6,93 +6,111 @@ This is a test module for the Resources.Geometries.Line class using unittest
 import sys
 import unittest
 
-from geological_toolbox.db_handler import DBHandler
 from geological_toolbox.exceptions import DatabaseRequestException
 from geological_toolbox.geometries import GeoPoint, Line
 from geological_toolbox.stratigraphy import StratigraphicObject
+from geological_toolbox.tests import InMemoryDatabaseTestData, RollbackTestMixin
 
 
 # noinspection DuplicatedCode
-class TestLineClass(unittest.TestCase):
+class TestLineClass(RollbackTestMixin, InMemoryDatabaseTestData, unittest.TestCase):
     """
     This is a unittest class for the Resources.Geometries.Line class
     """
 
-    def setUp(self):
+    # test data, added to the database once for all tests (see setUpClass)
+    lines = (
+        {
+            "closed": False,
+            "horizon": "mu",
+            "age": 3,
+            "update": False,
+            "points": ((1204067.0548148106, 634617.5980860253),
+                       (1204067.0548148106, 620742.1035724243),
+                       (1215167.4504256917, 620742.1035724243),
+                       (1215167.4504256917, 634617.5980860253),
+                       (1204067.0548148106, 634617.5980860253)),
+            "name": "Line_1"
+        }, {
+            "closed": True,
+            "horizon": "so",
+            "age": 2,
+            "update": True,
+            "points": ((1179553.6811741155, 647105.5431482664),
+                       (1179553.6811741155, 626292.3013778647),
+                       (1194354.20865529, 626292.3013778647),
+                       (1194354.20865529, 647105.5431482664)),
+            "name": "Line_2"
+        }, {
+            "closed": False,
+            "horizon": "mm",
+            "age": 4,
+            "update": True,
+            "points": ((1179091.1646903288, 712782.8838459781),
+                       (1161053.0218226474, 667456.2684348812),
+                       (1214704.933941905, 641092.8288590391),
+                       (1228580.428455506, 682719.3123998424),
+                       (1218405.0658121984, 721108.1805541387)),
+            "name": "Line_3"
+        }, {
+            "closed": False,
+            "horizon": "mo",
+            "age": 5,
+            "update": True,
+            "points": ((1149490.1097279799, 691044.6091080031),
+                       (1149490.1097279799, 648030.5761158396),
+                       (1191579.1097525698, 648030.5761158396),
+                       (1149490.1097279799, 648030.5761158396),
+                       (1191579.1097525698, 691044.6091080031),
+                       (1149490.1097279799, 691044.6091080031)),
+            "name": "Line_2"
+        }
+    )
+
+    @classmethod
+    def setUpClass(cls):
         # type: () -> None
         """
-        Initialise a temporary database connection for all test cases and fill the database with test data
+        Initialise a temporary database connection for all test cases and fill the database with test data once for
+        the whole test class
 
         :return: None
         """
-        # initialise a in-memory sqlite database
-        self.handler = DBHandler(connection="sqlite://", echo=False)
-        self.session = self.handler.get_session()
+        cls.create_database()
+        session = cls.handler.get_session()
 
         # handler = DBHandler(
         # 		connection="sqlite:////Users/stephan/Documents/data.db",
         # 		debug=False)
         # handler = DBHandler(connection="sqlite:///D:\\data.db", debug=False)
 
-        # add test data to the database
-        self.lines = [
-            {
-                "closed": False,
-                "horizon": "mu",
-                "age": 3,
-                "update": False,
-                "points": ((1204067.0548148106, 634617.5980860253),
-                           (1204067.0548148106, 620742.1035724243),
-                           (1215167.4504256917, 620742.1035724243),
-                           (1215167.4504256917, 634617.5980860253),
-                           (1204067.0548148106, 634617.5980860253)),
-                "name": "Line_1"
-            }, {
-                "closed": True,
-                "horizon": "so",
-                "age": 2,
-                "update": True,
-                "points": ((1179553.6811741155, 647105.5431482664),
-                           (1179553.6811741155, 626292.3013778647),
-                           (1194354.20865529, 626292.3013778647),
-                           (1194354.20865529, 647105.5431482664)),
-                "name": "Line_2"
-            }, {
-                "closed": False,
-                "horizon": "mm",
-                "age": 4,
-                "update": True,
-                "points": ((1179091.1646903288, 712782.8838459781),
-                           (1161053.0218226474, 667456.2684348812),
-                           (1214704.933941905, 641092.8288590391),
-                           (1228580.428455506, 682719.3123998424),
-                           (1218405.0658121984, 721108.1805541387)),
-                "name": "Line_3"
-            }, {
-                "closed": False,
-                "horizon": "mo",
-                "age": 5,
-                "update": True,
-                "points": ((1149490.1097279799, 691044.6091080031),
-                           (1149490.1097279799, 648030.5761158396),
-                           (1191579.1097525698, 648030.5761158396),
-                           (1149490.1097279799, 648030.5761158396),
-                           (1191579.1097525698, 691044.6091080031),
-                           (1149490.1097279799, 691044.6091080031)),
-                "name": "Line_2"
-            }
-        ]
-
-        for line in self.lines:
+        # the lines and their points are stored with one commit
+        new_lines = list()
+        for line in cls.lines:
             points = list()
             for point in line["points"]:
                 points.append(
-                    GeoPoint(None, False, "", point[0], point[1], 0, self.session, line["name"], ""))
-            new_line = Line(line["closed"],
-                            StratigraphicObject.init_stratigraphy(self.session, line["horizon"], line["age"],
-                                                                  line["update"]),
-                            points, self.session, line["name"], "")
-            new_line.save_to_db()
+                    GeoPoint(None, False, "", point[0], point[1], 0, session, line["name"], ""))
+            new_lines.append(Line(line["closed"],
+                                  StratigraphicObject.init_stratigraphy(session, line["horizon"], line["age"],
+                                                                        line["update"]),
+                                  points, session, line["name"], ""))
+        Line.bulk_save_to_db(new_lines, session)
+
+        cls.handler.close_session()
+
+    def _get_line(self, line_id):
+        # type: (int) -> Line
+        """
+        Returns the line with the given id, lines already loaded by the session are returned without a query
+
+        :param line_id: id of the requested line
+        :return: the requested line
+        :raises AssertionError: Raises AssertionError if the line doesn't exist
+        """
+        line = self.session.get(Line, line_id)
+        self.assertIsNotNone(line, "No line found for line-id-request ({})".format(line_id))
+        return line
 
     def test_init(self):
         # type: () -> None
@@ -153,44 +171,31 @@ class TestLineClass(unittest.TestCase):
         """
         insert_point = GeoPoint(StratigraphicObject.init_stratigraphy(self.session, "mu"), False, "", 1204200, 620800,
                                 0, self.session)
-        line_query = self.session.query(Line).filter_by(id=1)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(1)
         line.session = self.session
         line.insert_point(insert_point, 1)
 
         self.assertEqual(line.points[1].line_pos, 1)
+        # the lookup by primary key doesn't autoflush, the new point is written explicitly
+        self.session.flush()
 
-        # point is inserted, now delete insert details
-        del count
-        del line
-        del line_query
+        # point is inserted, the line is reloaded from the database
+        self.session.expire_all()
 
         # test the insertion-process
-        line_query = self.session.query(Line).filter_by(id=1)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(1)
         # 20 Point initially, 2 removed, new point is Nr 19 -> id=19
         # !!!ATTENTION!!! counting starts with 1 not 0 in sqlite-DB!
         # line-pos and get_point_index should be 1
 
-        self.assertEqual(line.points[1].id, 19, "Wrong id ({}) for new point (should be {})".
-                         format(line.points[1].id, 19))
-        self.assertEqual(line.points[1].line_pos, 1, "Wrong position of the new point ({}) in the line (should be {})".
-                         format(line.points[1].line_pos, 1))
+        line_points = line.points
+        for index, attribute, value in ((1, "id", 19), (1, "line_pos", 1), (1, "easting", 1204200),
+                                        (1, "northing", 620800), (1, "altitude", 0), (1, "has_z", False)):
+            self.assertEqual(getattr(line_points[index], attribute), value, "Wrong {} ({}) of point {} (should be {})".
+                             format(attribute, getattr(line_points[index], attribute), index, value))
         self.assertEqual(line.get_point_index(insert_point), 1,
                          "Wrong get_point_index(...) value ({}) in the line (should be {})".
                          format(line.get_point_index(insert_point), 1))
-        self.assertEqual(line.points[1].easting, 1204200, "Wrong easting ({} / should be {})".
-                         format(line.points[1].easting, 1204200))
-        self.assertEqual(line.points[1].northing, 620800, "Wrong northing ({} / should be {})".
-                         format(line.points[1].northing, 620800))
-        self.assertEqual(line.points[1].altitude, 0, "Wrong altitude ({} / should be {})".
-                         format(line.points[1].altitude, 0))
-        self.assertEqual(line.points[1].has_z, False, "Wrong has_z ({} / should be {})".
-                         format(line.points[1].has_z, False))
 
         # test Exception handling
         self.assertRaises(TypeError, line.insert_point, "string", 1)
@@ -204,61 +209,34 @@ class TestLineClass(unittest.TestCase):
         :return: Nothing
         :raises AssertionError: Raises AssertionError if a test fails
         """
-        insert_point_1 = GeoPoint(StratigraphicObject.init_stratigraphy(self.session, "mu"), False, "", 1204200, 620800,
-                                  0, self.session)
-        insert_point_2 = GeoPoint(StratigraphicObject.init_stratigraphy(self.session, "mu"), False, "", 1204500, 621200,
-                                  0, self.session)
-        insert_point_3 = GeoPoint(StratigraphicObject.init_stratigraphy(self.session, "mu"), False, "", 1204700, 621000,
-                                  0, self.session)
-        insert_point_4 = GeoPoint(StratigraphicObject.init_stratigraphy(self.session, "mu"), False, "", 1204700, 621000,
-                                  0, self.session)
+        strat = StratigraphicObject.init_stratigraphy(self.session, "mu")
+        insert_point_1 = GeoPoint(strat, False, "", 1204200, 620800, 0, self.session)
+        insert_point_2 = GeoPoint(strat, False, "", 1204500, 621200, 0, self.session)
+        insert_point_3 = GeoPoint(strat, False, "", 1204700, 621000, 0, self.session)
+        insert_point_4 = GeoPoint(strat, False, "", 1204700, 621000, 0, self.session)
 
         points = [insert_point_1, insert_point_2, insert_point_3, insert_point_4]
-        line_query = self.session.query(Line).filter_by(id=1)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(1)
         line.session = self.session
         line.insert_points(points, 1)
         line.save_to_db()
 
-        # point is inserted, now delete insert details
-        del count
-        del insert_point_1, insert_point_2, insert_point_3
-        del line
-        del line_query
+        # points are inserted, the line is reloaded from the database
+        self.session.expire_all()
 
         # test the insertion-process
-        line_query = self.session.query(Line).filter_by(id=1)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(1)
 
         # 20 Point initially, 2 removed, new point are Nr 19-21 -> id=19 to 21
         # !!!ATTENTION!!! counting starts with 1 not 0 in sqlite-DB!
         # line-pos should be 1, 2 and 3
-        self.assertEqual(line.points[1].id, 19, "Wrong id ({}) for new point (should be {})".
-                         format(line.points[1].id, 19))
-        self.assertEqual(line.points[2].id, 20, "Wrong id ({}) for new point (should be {})".
-                         format(line.points[2].id, 20))
-        self.assertEqual(line.points[3].id, 21, "Wrong id ({}) for new point (should be {})".
-                         format(line.points[3].id, 21))
-        self.assertEqual(line.points[4].id, 2, "Wrong id ({}) for point after insert (should be {})".
-                         format(line.points[4].id, 2))
-        self.assertEqual(line.points[1].line_pos, 1, "Wrong position of the new point ({}) in the line (should be {})".
-                         format(line.points[1].line_pos, 1))
-        self.assertEqual(line.points[2].line_pos, 2, "Wrong position of the new point ({}) in the line (should be {})".
-                         format(line.points[2].line_pos, 2))
-        self.assertEqual(line.points[3].line_pos, 3, "Wrong position of the new point ({}) in the line (should be {})".
-                         format(line.points[3].line_pos, 3))
-        self.assertEqual(line.points[1].easting, 1204200, "Wrong easting ({} / should be {})".
-                         format(line.points[1].easting, 1204200))
-        self.assertEqual(line.points[1].northing, 620800, "Wrong northing ({} / should be {})".
-                         format(line.points[1].northing, 620800))
-        self.assertEqual(line.points[1].altitude, 0, "Wrong altitude ({} / should be {})".
-                         format(line.points[1].altitude, 0))
-        self.assertEqual(line.points[1].has_z, False, "Wrong has_z ({} / should be {})".
-                         format(line.points[1].has_z, False))
+        line_points = line.points
+        for index, attribute, value in ((1, "id", 19), (2, "id", 20), (3, "id", 21), (4, "id", 2),
+                                        (1, "line_pos", 1), (2, "line_pos", 2), (3, "line_pos", 3),
+                                        (1, "easting", 1204200), (1, "northing", 620800), (1, "altitude", 0),
+                                        (1, "has_z", False)):
+            self.assertEqual(getattr(line_points[index], attribute), value, "Wrong {} ({}) of point {} (should be {})".
+                             format(attribute, getattr(line_points[index], attribute), index, value))
 
         # test Exception handling
         self.assertRaises(ValueError, line.insert_points, points, "abc")
@@ -277,43 +255,31 @@ class TestLineClass(unittest.TestCase):
         :raises AssertionError: Raises AssertionError if a test fails
         """
 
-        line_query = self.session.query(Line).filter_by(id=2)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(2)
         line.session = self.session
         line.delete_point(line.points[2])
 
         # save deletion and reload line, test afterwards
         line.save_to_db()
-        del count
-        del line
-        del line_query
+        self.session.expire_all()
 
-        line = self.session.query(Line).filter_by(id=2).one()
+        line = self._get_line(2)
         self.assertEqual(len(line.points), 3, "Wrong Nr of points ({}), should be {}".format(len(line.points), 3))
 
         # test exception handling
         self.assertRaises(TypeError, line.delete_point, "string")
         self.assertRaises(ValueError, line.delete_point, GeoPoint(None, False, "", 1, 2, 0, self.session, "", ""))
 
-        del line
-
         # /2/ test deletion by coordinates
-        line_query = self.session.query(Line).filter_by(id=3)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(3)
         line.session = self.session
         line.delete_point_by_coordinates(1214704.933941905, 641092.8288590391, 0)
 
         # save deletion and reload line, test afterwards
         line.save_to_db()
-        del count
-        del line
-        del line_query
+        self.session.expire_all()
 
-        line = self.session.query(Line).filter_by(id=3).one()
+        line = self._get_line(3)
         self.assertEqual(len(line.points), 4, "Wrong Nr of points ({}), should be {}".format(len(line.points), 4))
         self.assertEqual(line.points[1].id, 10,
                          "First point before deleted point should have id {} but has {}".format(10, line.points[1].id))
@@ -325,20 +291,15 @@ class TestLineClass(unittest.TestCase):
         self.assertRaises(ValueError, line.delete_point_by_coordinates, 123, 456, 789)
 
         # /3/ test auto-removal of doubled points after deletion
-        line_query = self.session.query(Line).filter_by(id=4)
-        count = line_query.count()
-        self.assertEqual(count, 1, "Get more than one expected result for line-id-request ({})".format(count))
-        line = line_query.one()
+        line = self._get_line(4)
         line.session = self.session
         line.delete_point_by_coordinates(1191579.1097525698, 648030.5761158396, 0)
 
         # save deletion and reload line, test afterwards
         line.save_to_db()
-        del count
-        del line
-        del line_query
+        self.session.expire_all()
 
-        line = self.session.query(Line).filter_by(id=4).one()
+        line = self._get_line(4)
         self.assertEqual(len(line.points), 3, "Wrong Nr of points ({}), should be {}".format(len(line.points), 3))
         self.assertEqual(line.points[1].id, 15,
                          "First point before deleted point should have id {} but has {}".format(15, line.points[1].id))
@@ -359,9 +320,12 @@ class TestLineClass(unittest.TestCase):
         """
 
         # Part 1: load all lines from the database
-        lines = Line.load_all_from_db(self.session)
+        # the points of all lines are loaded with one additional query instead of one query per line
+        lines = Line.load_all_from_db(self.session, eager=("points",))
 
         self.assertEqual(len(lines), 4, "Wrong number of lines ({}), should be {}".format(len(lines), 4))
+        for line in lines:
+            self.assertIn("points", line.__dict__, "Points of line {} are not loaded".format(line.id))
         self.assertEqual(lines[0].id, 1, "First line has wrong id ({}), should be {}".format(lines[0].id, 1))
         self.assertEqual(len(lines[0].points), 4, "Number of points ({}) of the first line is wrong. Should be {}". \
                          format(len(lines[0].points), 4))
@@ -372,8 +336,6 @@ class TestLineClass(unittest.TestCase):
         # test exception handling
         self.assertRaises(TypeError, Line.load_all_from_db, "test")
 
-        del lines
-
         # Part 2: load line by id
         line = Line.load_by_id_from_db(2, self.session)
         self.assertEqual(line.id, 2, "line id is wrong ({}), should be {}".format(line.id, 2))
@@ -387,27 +349,19 @@ class TestLineClass(unittest.TestCase):
         # test exception handling
         self.assertRaises(DatabaseRequestException, Line.load_by_id_from_db, 25, self.session)
 
-        del line
-
         # Part 3: load lines by name
         lines = Line.load_by_name_from_db("Line_3", self.session)
         self.assertEqual(len(lines), 1, "Wrong number of lines ({}), should be {}".format(len(lines), 1))
         self.assertEqual(lines[0].id, 3, "Returned line has wrong id ({}), should be {}".format(lines[0].id, 3))
 
-        del lines
-
         lines = Line.load_by_name_from_db("Line_2", self.session)
         self.assertEqual(len(lines), 2, "Wrong number of lines ({}), should be {}".format(len(lines), 2))
         self.assertEqual(lines[0].id, 2, "Returned line has wrong id ({}), should be {}".format(lines[0].id, 2))
         self.assertEqual(lines[1].id, 4, "Returned line has wrong id ({}), should be {}".format(lines[0].id, 4))
 
-        del lines
-
         lines = Line.load_by_name_from_db("Test", self.session)
         self.assertEqual(len(lines), 0, "Wrong number of lines ({}), should be {}".format(len(lines), 0))
 
-        del lines
-
         # Part 4: load lines with minimal one point in given extent
         # x -> 1174000 - 1200000
         # y ->  613500 -  651000
@@ -417,13 +371,9 @@ class TestLineClass(unittest.TestCase):
         self.assertEqual(lines[0].id, 2, "Returned line has wrong id ({}), should be {}".format(lines[0].id, 2))
         self.assertEqual(lines[1].id, 4, "Returned line has wrong id ({}), should be {}".format(lines[0].id, 4))
 
-        del lines
-
         lines = Line.load_in_extent_from_db(self.session, 0, 1, 0, 1)
         self.assertEqual(len(lines), 0, "Wrong number of lines ({}), should be {}".format(len(lines), 9))
 
-        del lines
-
     def test_setter_and_getter(self):
         # type: () -> None
         """
@@ -439,10 +389,11 @@ class TestLineClass(unittest.TestCase):
         session_2 = lines[3].session
         lines[3].session = session_2
 
-        for line in lines:
-            line.save_to_db()
+        with Line.deferred_commit(self.session):
+            for line in lines:
+                line.save_to_db()
 
-        del lines
+        self.session.expire_all()
 
         lines = Line.load_all_from_db(self.session)
         line_with_name = Line.load_by_name_from_db("Line_2", self.session)
@@ -456,14 +407,5 @@ class TestLineClass(unittest.TestCase):
                          "Wrong Number of lines with line name 'Line_2' ({}). Should be {}". \
                          format(len(line_with_name), 3))
 
-    def tearDown(self):
-        # type: () -> None
-        """
-        Close session after testruns
-
-        :return: Nothing
-        """
-        self.handler.close_last_session()
-
     if __name__ == "__main__":
         unittest.main()
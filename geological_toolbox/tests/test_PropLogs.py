@@ -106,6 +106,44 @@ class TestWellLogValueClass(unittest.TestCase):
         self.assertEqual(log_values[1].value, 3245.4)
         self.assertEqual(log_values[2].value, 641.54)
 
+    def test_bulk_save(self):
+        # type: () -> None
+        """
+        Tests the bulk insertion of WellLogValues
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        new_values = [WellLogValue(i, 2 * i, self.session, "bulk", "") for i in range(25)]
+        WellLogValue.bulk_save_to_db(new_values, self.session, batch_size=10)
+
+        log_values = WellLogValue.load_by_name_from_db("bulk", self.session)
+        self.assertEqual(len(log_values), 25)
+        self.assertEqual(log_values[-1].depth, 24)
+        self.assertEqual(log_values[-1].value, 48)
+        self.assertEqual(len(WellLogValue.load_all_from_db(self.session)), 28)
+
+        self.assertRaises(TypeError, WellLogValue.bulk_save_to_db, new_values, "session")
+        self.assertRaises(ValueError, WellLogValue.bulk_save_to_db, new_values, self.session, 0)
+
+    def test_deferred_commit(self):
+        # type: () -> None
+        """
+        Tests the deferred commit of single save_to_db calls
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        with WellLogValue.deferred_commit(self.session):
+            for i in range(5):
+                WellLogValue(i, 3 * i, self.session, "deferred", "").save_to_db()
+            self.assertEqual(len(self.session.new), 5)
+
+        self.assertEqual(len(self.session.new), 0)
+        log_values = WellLogValue.load_by_name_from_db("deferred", self.session)
+        self.assertEqual(len(log_values), 5)
+        self.assertEqual(log_values[-1].value, 12)
+
     def tearDown(self):
         # type: () -> None
         """
@@ -212,7 +250,7 @@ class TestWellLogClass(unittest.TestCase):
         del logging
 
         logging = WellLog.load_all_from_db(self.session)[0]
-        self.assertEqual(logging.property_name, longname[:100])
+        self.assertEqual(logging.property_name, longname[:50])
         self.assertEqual(logging.property_unit, longname[:100])
 
     def test_insert_and_delete_logvalue(self):
@@ -3,11 +3,15 @@
 This is a test module for the Resources.Geometries.Well and WellMarker classes using unittest
 """
 
+import numpy as np
+import re
 import unittest
 
 from geological_toolbox.db_handler import DBHandler
+from geological_toolbox.exceptions import ListOrderException
 from geological_toolbox.requests import Requests
 from geological_toolbox.stratigraphy import StratigraphicObject
+from geological_toolbox.tests import count_queries
 from geological_toolbox.wells import WellMarker, Well
 
 
@@ -247,6 +251,65 @@ class TestWellClass(unittest.TestCase):
         self.assertRaises(ValueError, Requests.well_markers_to_thickness,
                           self.session, "mu", "so", summarise_multiple=False, use_faulted=True, extent=[1, 2, 3, "ab"])
 
+    def test_well_markers_to_thickness_self_join(self):
+        # type: () -> None
+        """
+        Tests the Requests.well_markers_to_thickness(...) function with the self join marker query
+
+        :return: Nothing
+        :raises AssertionError: if a test fails
+        """
+        Requests.use_marker_self_join = True
+        try:
+            self.test_well_markers_to_thickness()
+        finally:
+            Requests.use_marker_self_join = False
+
+    def test_check_extent(self):
+        # type: () -> None
+        """
+        Tests the Requests.check_extent(...) function
+
+        :return: Nothing
+        :raises AssertionError: if a test fails
+        """
+        extent = [1, "2", 3, 4.5]
+        self.assertEqual(Requests.check_extent(extent), [1.0, 2.0, 3.0, 4.5])
+        self.assertEqual(extent, [1.0, 2.0, 3.0, 4.5], "list is not converted in place")
+        self.assertEqual(Requests.check_extent((1, 2, 3, 4)), [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(Requests.check_extent(np.array([1, 2, 3, 4])), [1.0, 2.0, 3.0, 4.0])
+        self.assertIsNone(Requests.check_extent(None))
+
+        self.assertRaises(TypeError, Requests.check_extent, "abcd")
+        self.assertRaises(ValueError, Requests.check_extent, [1, 2, 3])
+        self.assertRaises(ValueError, Requests.check_extent, [[1, 2], [3, 4]])
+        self.assertRaises(ValueError, Requests.check_extent, [1, 2, 3, "ab"])
+        self.assertRaises(ListOrderException, Requests.check_extent, [2, 1, 3, 4])
+        self.assertRaises(ListOrderException, Requests.check_extent, (1, 2, 4, 3))
+
+    def test_well_markers_to_thickness_queries(self):
+        # type: () -> None
+        """
+        Tests that Requests.well_markers_to_thickness(...) doesn't load the horizons of the marker one by one
+
+        :return: Nothing
+        :raises AssertionError: if a test fails
+        """
+        session = self.handler.create_new_session()
+        with count_queries(session.get_bind()) as statements:
+            result = Requests.well_markers_to_thickness(session, "mu", "so", summarise_multiple=True,
+                                                        use_faulted=True, extent=None)
+
+        self.assertEqual(len(result), 3)
+        # lazy loading of a single horizon by its primary key
+        horizon_loads = [x for x in statements if re.search(r"FROM stratigraphy\s+WHERE stratigraphy.id = ", x)]
+        self.assertEqual(len(horizon_loads), 0, "Horizons are loaded separately:\n{}".format(horizon_loads))
+        well_loads = [x for x in statements if re.search(r"FROM wells\s+WHERE wells.id = ", x)]
+        self.assertEqual(len(well_loads), 0, "Wells are loaded separately:\n{}".format(well_loads))
+        # fault marker of all wells are loaded at once
+        fault_loads = [x for x in statements if x.startswith("SELECT well_marker.well_id AS ")]
+        self.assertEqual(len(fault_loads), 1, "Wrong number of fault queries ({})".format(len(fault_loads)))
+
     def tearDown(self):
         # type: () -> None
         """
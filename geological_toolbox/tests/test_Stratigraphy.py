@@ -7,6 +7,7 @@ import unittest
 
 from geological_toolbox.db_handler import DBHandler
 from geological_toolbox.stratigraphy import StratigraphicObject
+from geological_toolbox.tests import count_queries
 
 
 class TestStratigraphyClass(unittest.TestCase):
@@ -70,6 +71,13 @@ class TestStratigraphyClass(unittest.TestCase):
         result = self.session.query(StratigraphicObject).all()
         self.assertEqual(len(result), 4, "Wrong number of entries ({}). Should be {}.".format(len(result), 4))
 
+        unit = StratigraphicObject("ku", 2.5, session=self.session)
+        self.assertEqual(unit.age, 2.5, "Wrong age ({}). Should be {}.".format(unit.age, 2.5))
+        unit = StratigraphicObject(42, "-3", session=self.session)
+        self.assertEqual(unit.statigraphic_name, "42")
+        self.assertEqual(unit.age, -1, "Wrong age ({}). Should be {}.".format(unit.age, -1))
+        self.assertRaises(ValueError, StratigraphicObject, "ko", "abc", session=self.session)
+
     def test_loading(self):
         # type: () -> None
         """
@@ -121,6 +129,13 @@ class TestStratigraphyClass(unittest.TestCase):
         result = StratigraphicObject.load_by_age_from_db(5, 10, self.session)
         self.assertEqual(len(result), 0, "Wrong number of query results ({}). Should be {}.".format(len(result), 0))
 
+        # loaded units are connected to the loading session
+        session = self.handler.create_new_session()
+        for unit in StratigraphicObject.load_all_from_db(session) + \
+                StratigraphicObject.load_by_age_from_db(0, 10, session) + \
+                [StratigraphicObject.load_by_stratigraphic_name_from_db("mo", session)]:
+            self.assertIs(unit.session, session, "Unit {} has a wrong session".format(unit.statigraphic_name))
+
     def test_setter_and_getter(self):
         # type: () -> None
         """
@@ -147,6 +162,50 @@ class TestStratigraphyClass(unittest.TestCase):
         self.assertEqual(result[0].statigraphic_name, 'Blubb',
                          "Wrong statigraphic_name of stratigraphic unit ({}). Should be {}".format(result[0].statigraphic_name, 'Blubb'))
 
+    def test_bulk_save(self):
+        # type: () -> None
+        """
+        Test the bulk storage of stratigraphic units
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        units = [StratigraphicObject(name, age, session=self.session)
+                 for name, age in (("ku", 6), ("mo", 10), ("km", 7), ("ku", 8), ("ko", 9))]
+        StratigraphicObject.bulk_save_to_db(units, self.session, batch_size=2)
+
+        result = {unit.statigraphic_name: unit.age for unit in StratigraphicObject.load_all_from_db(self.session)}
+        self.assertEqual(len(result), 7, "Wrong number of entries ({}). Should be {}.".format(len(result), 7))
+        self.assertEqual(result["mo"], 1, "Existing unit mo was changed")
+        self.assertEqual(result["ku"], 6, "Wrong age for ku ({}). Should be {}".format(result["ku"], 6))
+        self.assertEqual(result["ko"], 9, "Wrong age for ko ({}). Should be {}".format(result["ko"], 9))
+
+    def test_name_cache(self):
+        # type: () -> None
+        """
+        Test the cached name lookups of class StratigraphicObject
+
+        :return: Nothing
+
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        unit = StratigraphicObject.load_by_stratigraphic_name_from_db('mu', self.session)
+
+        with count_queries(self.session.get_bind()) as statements:
+            self.assertIs(StratigraphicObject.load_by_stratigraphic_name_from_db('mu', self.session), unit)
+            self.assertIs(StratigraphicObject.init_stratigraphy(self.session, 'mu'), unit)
+        self.assertEqual(len(statements), 0, "Cached unit loaded again:\n{}".format(statements))
+
+        # renamed units must not be found by their old name
+        unit.statigraphic_name = 'Blubb'
+        unit.save_to_db()
+        self.assertIsNone(StratigraphicObject.load_by_stratigraphic_name_from_db('mu', self.session))
+        self.assertIs(StratigraphicObject.load_by_stratigraphic_name_from_db('Blubb', self.session), unit)
+
+        # deleted units are not returned from the cache
+        StratigraphicObject.delete_from_db(unit, self.session)
+        self.assertIsNone(StratigraphicObject.load_by_stratigraphic_name_from_db('Blubb', self.session))
+
     def tearDown(self):
         # type: () -> None
         """
@@ -4,11 +4,14 @@ This is a test module for the Resources.Geometries.Well and WellMarker classes u
 """
 
 import math
+import sqlalchemy as sq
 import unittest
+from sqlalchemy.orm import Session
 
 from geological_toolbox.exceptions import WellMarkerDepthException
 from geological_toolbox.db_handler import DBHandler
 from geological_toolbox.stratigraphy import StratigraphicObject
+from geological_toolbox.tests import count_queries
 from geological_toolbox.well_logs import WellLog, WellLogValue
 from geological_toolbox.wells import WellMarker, Well
 from geological_toolbox.constants import float_precision
@@ -80,10 +83,11 @@ class TestWellClass(unittest.TestCase):
             new_well.save_to_db()
 
             for mark in well["marker"]:
-                new_well.marker.append(
+                # insert_marker keeps the marker sorted by depth, committed objects are not reloaded
+                new_well.insert_marker(
                     WellMarker(mark[0], StratigraphicObject.init_stratigraphy(self.session, mark[1], mark[2], False),
                                self.session, well["name"], mark[3]))
-                new_well.marker[-1].save_to_db()
+                new_well.save_to_db()
 
     def test_init(self):
         # type: () -> None
@@ -136,6 +140,15 @@ class TestWellClass(unittest.TestCase):
         self.assertTrue(wells[1].marker[0].horizon == wells[1].marker[3].horizon)
         del wells
 
+        # the session is set for all loaded objects, also for plain queries and lazy loaded relationships
+        session = self.handler.create_new_session()
+        well = session.query(Well).filter(Well.wellname == "Well_1").one()
+        self.assertIs(well.session, session)
+        self.assertTrue(all(marker.session is session for marker in well.marker))
+        self.assertIs(well.marker[0].horizon.session, session)
+        session.close()
+        del well
+
         # Part 2: load well by name
         well = Well.load_by_wellname_from_db("Well_2", self.session)
         self.assertEqual(well.well_name, "Well_2")
@@ -144,6 +157,24 @@ class TestWellClass(unittest.TestCase):
         self.assertEqual(len(well.marker), 4)
         self.assertEqual(well.marker[1].horizon.statigraphic_name, "mm")
         self.assertEqual(well.marker[1].depth, 120)
+
+        # repeated requests are answered from the session cache, renamed wells are not found by the old name
+        with count_queries(self.session.get_bind()) as statements:
+            self.assertIs(Well.load_by_wellname_from_db("Well_2", self.session), well)
+        self.assertEqual(len(statements), 0)
+        well.well_name = "Well_2b"
+        self.assertIsNone(Well.load_by_wellname_from_db("Well_2", self.session))
+        self.assertIs(Well.load_by_wellname_from_db("Well_2b", self.session), well)
+        self.session.rollback()
+        del well
+
+        # sessions of other classes than ToolboxSession don't use the cache, it wouldn't be cleared for them
+        session = Session(bind=self.handler.engine)
+        well = Well.load_by_wellname_from_db("Well_2", session)
+        with count_queries(self.handler.engine) as statements:
+            self.assertIs(Well.load_by_wellname_from_db("Well_2", session), well)
+        self.assertGreater(len(statements), 0)
+        session.close()
         del well
 
         # Part 3: load wells in given extent
@@ -167,6 +198,15 @@ class TestWellClass(unittest.TestCase):
         self.assertTrue(wells[1].depth >= 395.23)
         del wells
 
+        # streamed loading
+        wells = Well.load_deeper_than_value_from_db(self.session, 395.23, stream=True)
+        self.assertFalse(isinstance(wells, list))
+        wells = list(wells)
+        self.assertEqual([x.well_name for x in wells], ["Well_1", "Well_3"])
+        self.assertEqual(len(wells[0].marker), 5)
+        self.assertIs(wells[0].session, self.session)
+        del wells
+
     def test_insertion(self):
         # type: () -> None
         """
@@ -191,8 +231,12 @@ class TestWellClass(unittest.TestCase):
         self.assertEqual(len(wells[2].marker), 6)
         self.assertEqual(wells[2].marker[2], marker_1)
         self.assertEqual(wells[2].marker[4], marker_2)
+        self.session.commit()
         del wells
 
+        # the marker moved from the first to the third well has to be stored, not only kept in the identity map
+        self.session.expire_all()
+        self.assertEqual(self.session.query(WellMarker.well_id).filter(WellMarker.id == marker_1.id).all(), [(3,)])
         wells = Well.load_all_from_db(self.session)
         self.assertEqual(wells[2].marker[2], marker_1)
         self.assertEqual(wells[2].marker[4], marker_2)
@@ -201,6 +245,45 @@ class TestWellClass(unittest.TestCase):
         wells = Well.load_all_from_db(self.session)
         self.assertRaises(ValueError, wells[1].insert_multiple_marker, [marker_1, marker_2, marker_3])
 
+        # larger lists are validated with numpy
+        horizon = StratigraphicObject.init_stratigraphy(self.session, "ku")
+        count = len(wells[1].marker)
+        marker = [WellMarker(i, horizon, self.session) for i in range(40)]
+        self.assertRaises(ValueError, wells[1].insert_multiple_marker,
+                          marker + [WellMarker(wells[1].depth + 0.5, horizon, self.session)])
+        self.assertRaises(TypeError, wells[1].insert_multiple_marker, marker + ["marker"])
+        self.assertEqual(len(wells[1].marker), count)
+        wells[1].insert_multiple_marker(marker)
+        self.assertEqual(len(wells[1].marker), count + 40)
+
+    def test_bulk_insert_marker(self):
+        # type: () -> None
+        """
+        Test the Well.bulk_insert_marker function
+
+        :return: Nothing
+        :raises AssertionError: Raises AssertionError if a test fails
+        """
+        well = Well.load_by_wellname_from_db("Well_3", self.session)
+        count = len(well.marker)
+        horizon = StratigraphicObject.init_stratigraphy(self.session, "bulk_horizon")
+        marker = [WellMarker(depth, horizon, self.session, "bulk {}".format(depth)) for depth in (250.5, 3.5, 120)]
+
+        self.assertRaises(TypeError, well.bulk_insert_marker, marker + ["marker"])
+        self.assertRaises(ValueError, well.bulk_insert_marker,
+                          marker + [WellMarker(well.depth + 1, horizon, self.session)])
+        self.assertEqual(len(well.marker), count)
+
+        well.bulk_insert_marker(marker)
+        self.session.commit()
+        self.assertEqual(len(well.marker), count + 3)
+        self.assertEqual([x.depth for x in well.marker], sorted(x.depth for x in well.marker))
+        inserted = [x for x in well.marker if x.horizon == horizon]
+        self.assertEqual([x.depth for x in inserted], [3.5, 120, 250.5])
+        self.assertEqual(inserted[0].name, "bulk 3.5")
+        self.assertEqual(inserted[0].well, well)
+        self.assertIsNotNone(horizon.id)
+
     def test_get_marker_by_depth(self):
         # type: () -> None
         """
@@ -211,7 +294,25 @@ class TestWellClass(unittest.TestCase):
         """
         well = Well.load_by_wellname_from_db("Well_1", self.session)
         self.assertEqual(well.get_marker_by_depth(16).horizon.statigraphic_name, "sm")
+        self.assertEqual(well.get_marker_by_depth("5").horizon.statigraphic_name, "mm")
+        self.assertEqual(well.get_marker_by_depth(17).horizon.statigraphic_name, "su")
         self.assertRaises(ValueError, well.get_marker_by_depth, 100)
+        self.assertRaises(ValueError, well.get_marker_by_depth, 0)
+
+        # marker appended without sorting
+        well.marker.append(WellMarker(1, StratigraphicObject.init_stratigraphy(self.session, "ko", 0, False),
+                                      self.session))
+        self.assertEqual(well.get_marker_by_depth(1).horizon.statigraphic_name, "ko")
+        self.assertEqual([marker.depth for marker in well.marker], sorted(marker.depth for marker in well.marker),
+                         "marker are not sorted after the depth lookup")
+
+        # the cached depths follow changed marker depths and the reloaded collection
+        well.get_marker_by_depth(16).depth = 2
+        self.assertEqual(well.get_marker_by_depth(2).horizon.statigraphic_name, "sm")
+        self.assertRaises(ValueError, well.get_marker_by_depth, 16)
+        self.session.flush()
+        self.session.expire(well, ["marker"])
+        self.assertEqual(well.get_marker_by_depth(2).horizon.statigraphic_name, "sm")
 
     def test_delete_marker(self):
         # type: () -> None
@@ -306,6 +407,17 @@ class TestWellClass(unittest.TestCase):
         # setter and getter for session
         wells[2].session = wells[1].session
 
+        # new session: the marker are not loaded for the check
+        session = self.handler.create_new_session()
+        well = Well.load_by_wellname_from_db("Well_3", session, eager=())
+        with(self.assertRaises(WellMarkerDepthException)):
+            well.depth = 500
+        well.depth = 640
+        self.assertIn("marker", sq.inspect(well).unloaded)
+        session.rollback()
+        session.close()
+        del well
+
     def test_log_handling(self):
         # type: () -> None
         """
@@ -485,6 +597,55 @@ class TestWellMarkerClass(unittest.TestCase):
         self.assertEqual(marker[4].horizon.statigraphic_name, "z")
         self.assertEqual(marker[5].horizon.statigraphic_name, "mo")
 
+    def test_WellMarker_loading(self):
+        # type: () -> None
+        """
+        Test the loading functions of the WellMarker class
+
+        :return: Nothing
+        :raises AssertionError: Raises Assertion Error if a test fails
+        """
+        marker = WellMarker.load_in_extent_from_db(self.session, 500, 1300, 0, 2400)
+        self.assertEqual(len(marker), 9)
+        self.assertTrue(all(type(x) is WellMarker for x in marker), "Result contains other objects than WellMarker")
+        self.assertEqual({x.well.well_name for x in marker}, {"Well_1", "Well_2"})
+
+        horizon = StratigraphicObject.load_by_stratigraphic_name_from_db("mu", self.session)
+        marker = WellMarker.load_all_by_stratigraphy_from_db(horizon, self.session)
+        self.assertEqual([x.well.well_name for x in marker], ["Well_1", "Well_3", "Well_3"])
+
+        # repeated requests are answered from the session cache until the next flush
+        with count_queries(self.session.get_bind()) as statements:
+            cached = WellMarker.load_all_by_stratigraphy_from_db(horizon, self.session)
+            self.assertEqual(len(statements), 0)
+            self.assertEqual(cached, marker)
+            self.assertIsNot(cached, marker)
+            well = Well.load_by_wellname_from_db("Well_2", self.session)
+            well.insert_marker(WellMarker(1, horizon, self.session))
+            cached = WellMarker.load_all_by_stratigraphy_from_db(horizon, self.session)
+            self.assertEqual(len(cached), 4)
+        self.session.rollback()
+        self.assertEqual(len(WellMarker.load_all_by_stratigraphy_from_db(horizon, self.session)), 3)
+
+        marker = WellMarker.load_all_by_stratigraphy_in_extent_from_db(horizon, 500, 1300, 0, 2400, self.session)
+        self.assertEqual(len(marker), 1)
+        self.assertEqual(marker[0].to_geopoint().name, "Well_1")
+        self.assertIs(marker[0].session, self.session)
+
+        # the R*Tree index follows changed and deleted wells
+        well = Well.load_by_wellname_from_db("Well_3", self.session)
+        well.easting = 1000
+        well.northing = 1000
+        well.save_to_db()
+        marker = WellMarker.load_all_by_stratigraphy_in_extent_from_db(horizon, 500, 1300, 0, 2400, self.session)
+        self.assertEqual([x.well.well_name for x in marker], ["Well_1", "Well_3", "Well_3"])
+        marker = WellMarker.load_in_extent_from_db(self.session, 1000, 1000, 1000, 1000)
+        self.assertEqual(len(marker), 4)
+
+        Well.delete_from_db(well, self.session)
+        marker = WellMarker.load_in_extent_from_db(self.session, 500, 1300, 0, 2400)
+        self.assertEqual({x.well.well_name for x in marker}, {"Well_1", "Well_2"})
+
     def test_WellMarker_to_GeoPoint(self):
         # type: () -> None
         """
@@ -501,6 +662,56 @@ class TestWellMarkerClass(unittest.TestCase):
         self.assertEqual(point.name, "Well_1")
         self.assertEqual(point.horizon.statigraphic_name, "mu")
 
+    def test_stratigraphy_in_extent_query_plan(self):
+        # type: () -> None
+        """
+        Test that WellMarker.load_all_by_stratigraphy_in_extent_from_db is driven by the horizon index of the
+        well_marker table instead of a full table scan
+
+        :return: Nothing
+        :raises AssertionError: Raises Assertion Error if a test fails
+        """
+        statements = list()
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT well_marker."):
+                statements.append((statement, parameters))
+
+        horizon = StratigraphicObject.init_stratigraphy(self.session, "mm")
+        sq.event.listen(self.session.get_bind(), "before_cursor_execute", capture)
+        try:
+            marker = WellMarker.load_all_by_stratigraphy_in_extent_from_db(horizon, 0, 5000, 0, 5000, self.session)
+        finally:
+            sq.event.remove(self.session.get_bind(), "before_cursor_execute", capture)
+        self.assertTrue(len(marker) > 0)
+        self.assertEqual(len(statements), 1)
+
+        plan = [row[-1] for row in self.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statements[0][0],
+                                                                             statements[0][1])]
+        self.assertIn("SEARCH well_marker USING INDEX ix_well_marker_horizon (horizon_id=?)", plan)
+        self.assertIn("SEARCH wells USING INTEGER PRIMARY KEY (rowid=?)", plan)
+        self.assertFalse([x for x in plan if x.startswith("SCAN well_marker") or x.startswith("SCAN wells ")], plan)
+
+    def test_WellMarker_to_GeoPoints(self):
+        # type: () -> None
+        """
+        Test WellMarker.to_geopoints functionality
+
+        :return: Nothing
+        :raises AssertionError: Raises Assertion Error if a test fails
+        """
+        session = self.handler.create_new_session()
+        marker = session.query(WellMarker).order_by(WellMarker.id).all()
+        with count_queries(session.get_bind()) as statements:
+            points = WellMarker.to_geopoints(marker, session)
+
+        self.assertEqual(len(points), 13)
+        self.assertEqual(len(statements), 2, "Wrong number of queries ({}):\n{}".format(len(statements), statements))
+        self.assertEqual([x.name for x in points[:6]], ["Well_1"] * 5 + ["Well_2"])
+        self.assertEqual(points[0].altitude, 0.5)
+        self.assertEqual(points[4].horizon.statigraphic_name, "mm")
+        self.assertRaises(TypeError, WellMarker.to_geopoints, marker, "session")
+
     def tearDown(self):
         # type: () -> None
         """
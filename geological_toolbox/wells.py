@@ -3,19 +3,167 @@
 This module provides classes for storage of drilling data in a database.
 """
 
+import numpy as np
 import sqlalchemy as sq
-from sqlalchemy.orm import relationship
+from bisect import bisect_left
+from collections import OrderedDict
+from math import isclose
+from operator import attrgetter
+from sqlalchemy.orm import contains_eager, joinedload, relationship
 from sqlalchemy.orm.session import Session
-from typing import List
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql import Select
+from typing import Any, Iterator, List, Tuple
+from weakref import WeakKeyDictionary
 
 from geological_toolbox.exceptions import DatabaseException, WellMarkerDepthException
 from geological_toolbox.geo_object import AbstractGeoObject
 from geological_toolbox.geometries import GeoPoint
 from geological_toolbox.well_logs import WellLog
-from geological_toolbox.db_handler import Base, AbstractDBObject
+from geological_toolbox.db_handler import Base, AbstractDBObject, ToolboxSession, _check_session
 from geological_toolbox.stratigraphy import StratigraphicObject
 
 
+_wells_rtree = sq.table("wells_rtree", sq.column("id"), sq.column("minX"), sq.column("maxX"), sq.column("minY"),
+                        sq.column("maxY"))
+"""
+SQLite R*Tree index of the well coordinates. The virtual table isn't part of the metadata, it is created together
+with the wells table and kept up to date by triggers (see _WELLS_RTREE_DDL).
+"""
+
+_WELLS_RTREE_DDL = (
+    "CREATE VIRTUAL TABLE wells_rtree USING rtree(id, minX, maxX, minY, maxY)",
+    "CREATE TRIGGER wells_rtree_insert AFTER INSERT ON wells "
+    "WHEN new.east IS NOT NULL AND new.north IS NOT NULL BEGIN "
+    "INSERT INTO wells_rtree VALUES (new.id, new.east, new.east, new.north, new.north); END",
+    "CREATE TRIGGER wells_rtree_update AFTER UPDATE OF id, east, north ON wells BEGIN "
+    "DELETE FROM wells_rtree WHERE id = old.id; "
+    "INSERT INTO wells_rtree SELECT new.id, new.east, new.east, new.north, new.north "
+    "WHERE new.east IS NOT NULL AND new.north IS NOT NULL; END",
+    "CREATE TRIGGER wells_rtree_delete AFTER DELETE ON wells BEGIN "
+    "DELETE FROM wells_rtree WHERE id = old.id; END"
+)
+"""
+statements creating the R*Tree index of the wells table on SQLite databases
+"""
+
+_by_depth = attrgetter("drill_depth")
+"""sort key for WellMarker lists"""
+
+_VECTORIZE_MARKER_COUNT = 32
+"""minimal number of marker, for which the depths are validated with numpy instead of a Python loop"""
+
+
+_WELL_CACHE_SIZE = 512
+"""
+Maximum number of wells cached per session
+"""
+
+_well_cache: "WeakKeyDictionary[Session, OrderedDict]" = WeakKeyDictionary()
+"""
+Wells by name for each ToolboxSession, filled by Well.load_by_wellname_from_db and cleared after each flush and at the
+end of each transaction of the session
+"""
+
+
+def _get_cached_well(session: Session, name: str) -> "Well" or None:
+    """
+    Returns the cached well with the given name or None. A cached well is only returned, if it is still stored in the
+    database (persistent), belongs to the session and its name wasn't changed in the meantime. Otherwise the cache entry
+    is removed.
+
+    :param session: session of the well
+    :param name: name of the well
+    :return: the cached well or None
+    """
+    if not isinstance(session, ToolboxSession):
+        return None
+    wells = _well_cache.get(session)
+    if wells is None:
+        return None
+    well = wells.get(name)
+    if well is None:
+        return None
+
+    state = sq.inspect(well)
+    if state.persistent and (state.session is session) and (well.wellname == name):
+        wells.move_to_end(name)
+        return well
+
+    del wells[name]
+    return None
+
+
+def _cache_well(session: Session, well: "Well") -> None:
+    """
+    Stores a loaded well in the cache of the session. The least recently used well is dropped, if the cache is full.
+    Wells of other sessions than ToolboxSession aren't cached, the cache wouldn't be cleared for them.
+
+    :param session: session of the well
+    :param well: well loaded from the database
+    :return: Nothing
+    """
+    if not isinstance(session, ToolboxSession):
+        return
+    wells = _well_cache.get(session)
+    if wells is None:
+        wells = _well_cache[session] = OrderedDict()
+    wells[well.wellname] = well
+    wells.move_to_end(well.wellname)
+    if len(wells) > _WELL_CACHE_SIZE:
+        wells.popitem(last=False)
+
+
+_MARKER_CACHE_SIZE = 32
+"""
+Maximum number of horizons, for which the well marker are cached per session
+"""
+
+_marker_cache: "WeakKeyDictionary[Session, OrderedDict]" = WeakKeyDictionary()
+"""
+WellMarker by horizon id for each ToolboxSession, filled by WellMarker.load_all_by_stratigraphy_from_db and cleared
+after each flush and at the end of each transaction of the session
+"""
+
+
+@sq.event.listens_for(ToolboxSession, "after_flush")
+def _clear_flushed_caches(session: Session, flush_context: object) -> None:
+    """
+    Drops the cached wells and marker of a session after a flush, as the flush could have inserted, changed or deleted
+    wells and marker.
+
+    :param session: flushed session
+    :param flush_context: internal state of the flush
+    :return: Nothing
+    """
+    _well_cache.pop(session, None)
+    _marker_cache.pop(session, None)
+
+
+@sq.event.listens_for(ToolboxSession, "after_transaction_end")
+def _clear_transaction_caches(session: Session, transaction: object) -> None:
+    """
+    Drops the cached wells and marker of a session at the end of a transaction. A rollback restores renamed or deleted
+    wells and the next transaction could see wells and marker committed by other connections.
+
+    :param session: session of the transaction
+    :param transaction: the finished transaction
+    :return: Nothing
+    """
+    _well_cache.pop(session, None)
+    _marker_cache.pop(session, None)
+
+
+def _use_rtree(session: Session) -> bool:
+    """
+    Returns True, if the extent queries of the session can use the SQLite R*Tree index wells_rtree.
+
+    :param session: SQLAlchemy session of the query
+    :return: True for SQLite databases, else False
+    """
+    return session.get_bind().dialect.name == "sqlite"
+
+
 class WellMarker(Base, AbstractDBObject):
     """
     Represents single markers in a drilled well
@@ -25,6 +173,14 @@ class WellMarker(Base, AbstractDBObject):
     :raises TypeError: if one of the committed parameters cannot be converted to the expected type
     """
     __tablename__ = "well_marker"
+    __table_args__ = (
+        # marker of a well by horizon (e.g. the EXISTS condition of Requests.well_markers_to_thickness)
+        sq.Index("ix_wm_well_horizon", "well_id", "horizon_id"),
+        # marker of a well ordered by depth
+        sq.Index("ix_wm_well_depth", "well_id", "drill_depth"),
+        # marker of a horizon (e.g. WellMarker.load_all_by_stratigraphy_from_db)
+        sq.Index("ix_well_marker_horizon", "horizon_id")
+    )
 
     id = sq.Column(sq.INTEGER, sq.Sequence("well_marker_id_seq"), primary_key=True)
     drill_depth = sq.Column(sq.FLOAT)
@@ -59,7 +215,9 @@ class WellMarker(Base, AbstractDBObject):
         :return: depth of the well marker.
         :raises ValueError: if value if not of type float or cannot be converted to float
         """
-        return float(self.drill_depth)
+        depth = self.drill_depth
+        # FLOAT columns are already loaded as float
+        return depth if (type(depth) is float) else float(depth)
 
     @depth.setter
     def depth(self, value: float) -> None:
@@ -83,7 +241,7 @@ class WellMarker(Base, AbstractDBObject):
         """
         see getter
         """
-        if (value is not None) and (type(value) is not StratigraphicObject):
+        if (value is not None) and not isinstance(value, StratigraphicObject):
             raise TypeError("type of committed value ({}) is not StratigraphicObject!".format(type(value)))
 
         if value is None:
@@ -104,6 +262,58 @@ class WellMarker(Base, AbstractDBObject):
         return GeoPoint(self.horizon, True, self.well.reference_system, easting, northing, altitude, self.session,
                         self.well.well_name, self.comment)
 
+    @classmethod
+    def to_geopoints(cls, markers: List["WellMarker"], session: Session) -> List[GeoPoint]:
+        """
+        Returns the given well marker as GeoPoints (see :meth:`WellMarker.to_geopoint`). Wells and horizons, which are
+        not loaded yet, are loaded with one query per 1000 marker instead of one query per marker.
+
+        :param markers: well marker to convert
+        :param session: represents the database connection as SQLAlchemy Session
+        :return: a list of GeoPoints in the order of markers
+        :raises TypeError: if session is not of type SQLAlchemy Session
+        """
+        _check_session(session)
+
+        relations = (("well", Well, "well_id"), ("hor", StratigraphicObject, "horizon_id"))
+        points = list()
+        for start in range(0, len(markers), 1000):
+            batch = markers[start:start + 1000]
+            # many-to-one relationships are resolved from the identity map, the loaded objects have to be referenced
+            # until the batch is converted, as the identity map only holds weak references
+            loaded = list()
+            for relation, related_class, key in relations:
+                ids = {getattr(marker, key) for marker in batch if relation in sq.inspect(marker).unloaded}
+                if ids:
+                    loaded += session.query(related_class).filter(related_class.id.in_(ids)).all()
+            points += [marker.to_geopoint() for marker in batch]
+
+        return points
+
+    @classmethod
+    def _extent_statement(cls, use_rtree: bool) -> Select:
+        """
+        Returns a select statement for all WellMarker of the wells inside an extent together with their well and
+        horizon. The extent is passed as bound parameters min_easting, max_easting, min_northing and max_northing during
+        execution.
+
+        :param use_rtree: preselect the wells with the SQLite R*Tree index wells_rtree
+        :return: the select statement
+        """
+        statement = sq.select(cls). \
+            join(Well, Well.id == cls.well_id). \
+            options(contains_eager(cls.well), joinedload(cls.hor))
+        if use_rtree:
+            # the R*Tree stores the coordinates as 32 bit floats rounded outwards, therefore the boxes are only used
+            # as preselection, the exact comparison follows below
+            statement = statement.where(Well.id.in_(
+                sq.select(_wells_rtree.c.id).where(_wells_rtree.c.maxX >= sq.bindparam("min_easting"),
+                                                   _wells_rtree.c.minX <= sq.bindparam("max_easting"),
+                                                   _wells_rtree.c.maxY >= sq.bindparam("min_northing"),
+                                                   _wells_rtree.c.minY <= sq.bindparam("max_northing"))))
+        return statement.where(Well.east.between(sq.bindparam("min_easting"), sq.bindparam("max_easting")),
+                               Well.north.between(sq.bindparam("min_northing"), sq.bindparam("max_northing")))
+
     @classmethod
     def load_in_extent_from_db(cls, session: Session, min_easting: float, max_easting: float, min_northing: float,
                                max_northing: float) -> List["WellMarker"]:
@@ -117,25 +327,49 @@ class WellMarker(Base, AbstractDBObject):
         :param session: represents the database connection as SQLAlchemy Session
         :return: a list of WellMarker representing the result of the database query
         """
-        result = session.query(cls, Well). \
-            filter(Well.id == cls.well_id). \
-            filter(sq.between(Well.east, min_easting, max_easting)). \
-            filter(sq.between(Well.north, min_northing, max_northing)). \
-            order_by(cls.id).all()
-        for marker in result:
-            marker.session = session
-        return result
+        # well and horizon are loaded by the same query, to_geopoint() needs no further query
+        use_rtree = _use_rtree(session)
+        statement = cls._statement("in_extent_rtree" if use_rtree else "in_extent",
+                                   lambda: cls._extent_statement(use_rtree).order_by(cls.id))
+        return session.execute(statement, {"min_easting": min_easting, "max_easting": max_easting,
+                                           "min_northing": min_northing, "max_northing": max_northing}). \
+            scalars().all()
 
     @classmethod
     def load_all_by_stratigraphy_from_db(cls, horizon: StratigraphicObject, session: Session) -> List["WellMarker"]:
         """
-        Returns all WellMarker in the database which are related to the StratigraphicObject "horizon"
+        Returns all WellMarker in the database which are related to the StratigraphicObject "horizon". Repeated
+        requests for the same horizon are answered from a cache of the session until the session is flushed or the
+        transaction ends.
 
         :param horizon: stratigraphic object for the database query
         :param session: represents the database connection as SQLAlchemy Session
         :return: a list of WellMarker
         """
-        return session.query(cls).filter(WellMarker.horizon_id == horizon.id)
+        # pending changes are flushed like the autoflush of the query would do, this drops the cache if necessary
+        if session.autoflush and (session.new or session.dirty or session.deleted):
+            session.flush()
+        markers = _marker_cache.get(session)
+        result = None if (markers is None) else markers.get(horizon.id)
+        if result is not None:
+            markers.move_to_end(horizon.id)
+            return list(result)
+
+        # the wells are loaded by the same query, to_geopoint() needs no further query
+        statement = cls._statement(
+            "by_stratigraphy", lambda: sq.select(cls).options(joinedload(cls.well)).
+            where(cls.horizon_id == sq.bindparam("horizon_id")).order_by(cls.id))
+        result = session.execute(statement, {"horizon_id": horizon.id}).scalars().all()
+
+        if not isinstance(session, ToolboxSession):
+            return result
+        markers = _marker_cache.get(session)
+        if markers is None:
+            markers = _marker_cache[session] = OrderedDict()
+        markers[horizon.id] = tuple(result)
+        if len(markers) > _MARKER_CACHE_SIZE:
+            markers.popitem(last=False)
+        return result
 
     @classmethod
     def load_all_by_stratigraphy_in_extent_from_db(cls, horizon: StratigraphicObject, min_easting: float,
@@ -153,15 +387,15 @@ class WellMarker(Base, AbstractDBObject):
         :param session: represents the database connection as SQLAlchemy Session
         :return: a list of WellMarker
         """
-        result = session.query(cls, Well). \
-            filter(cls.horizon_id == horizon.id). \
-            filter(Well.id == cls.well_id). \
-            filter(sq.between(Well.east, min_easting, max_easting)). \
-            filter(sq.between(Well.north, min_northing, max_northing)). \
-            order_by(cls.id).all()
-        for marker in result:
-            marker.session = session
-        return result
+        # well and horizon are loaded by the same query, to_geopoint() needs no further query
+        use_rtree = _use_rtree(session)
+        statement = cls._statement(
+            "by_stratigraphy_in_extent_rtree" if use_rtree else "by_stratigraphy_in_extent",
+            lambda: cls._extent_statement(use_rtree).where(cls.horizon_id == sq.bindparam("horizon_id")).
+            order_by(cls.id))
+        return session.execute(statement, {"horizon_id": horizon.id, "min_easting": min_easting,
+                                           "max_easting": max_easting, "min_northing": min_northing,
+                                           "max_northing": max_northing}).scalars().all()
 
 
 class Well(Base, AbstractGeoObject):
@@ -175,6 +409,14 @@ class Well(Base, AbstractGeoObject):
     :raises ValueError: Raises ValueError if one of the types cannot be converted
     """
     __tablename__ = "wells"
+    __table_args__ = (
+        sq.Index("coordinate_index", "east", "north"),
+        # Well.load_deeper_than_value_from_db
+        sq.Index("ix_wells_depth", "drill_depth")
+    )
+
+    # sorted marker depths for Well.get_marker_by_depth, None if they have to be read again
+    __slots__ = ("_marker_depths",)
 
     id = sq.Column(sq.INTEGER, sq.Sequence("wells_id_seq"), primary_key=True)
     drill_depth = sq.Column(sq.FLOAT)
@@ -190,8 +432,6 @@ class Well(Base, AbstractGeoObject):
                                        backref="well", primaryjoin="Well.id == WellLog.well_id",
                                        cascade="all, delete, delete-orphan")
 
-    sq.Index("coordinate_index", AbstractGeoObject.east, AbstractGeoObject.north)
-
     def __init__(self, well_name: str, short_name: str, depth: float, *args, **kwargs) -> None:
         """
         initialize the class
@@ -205,19 +445,18 @@ class Well(Base, AbstractGeoObject):
         AbstractGeoObject.__init__(self, *args, **kwargs)
 
     def __repr__(self) -> str:
-        return "<Well(id='{}', well_name='{}', short_name='{}', depth='{}', marker='{}', logs='{}', comment='{}'," + \
-               " marker='{}')>".format(self.id, self.well_name, self.short_name, self.easting, self.northing,
-                                       self.altitude, self.depth, self.comment, repr(self.marker))
+        return ("<Well(id='{}', well_name='{}', short_name='{}', easting='{}', northing='{}', altitude='{}', "
+                "depth='{}', comment='{}', marker='{}')>").format(self.id, self.well_name, self.short_name,
+                                                                  self.easting, self.northing, self.altitude,
+                                                                  self.depth, self.comment, repr(self.marker))
 
     def __str__(self) -> str:
-        text = "[{}] {} ({}):\n{} - {} - {} - {} - {}" \
-            .format(self.id, self.well_name, self.short_name, self.easting, self.northing, self.altitude, self.depth,
-                    self.comment)
-
-        for marker in self.marker:
-            text += "\n" + str(marker)
-
-        return text
+        # joined once instead of extending the string for each marker
+        parts = ["[{}] {} ({}):\n{} - {} - {} - {} - {}".format(self.id, self.well_name, self.short_name, self.easting,
+                                                                 self.northing, self.altitude, self.depth,
+                                                                 self.comment)]
+        parts.extend(str(marker) for marker in self.marker)
+        return "\n".join(parts)
 
     @property
     def depth(self) -> float:
@@ -227,7 +466,9 @@ class Well(Base, AbstractGeoObject):
         :raises ValueError: Raises ValueError if depth is not of type float, it cannot be converted to float or when
                             depth is < 0
         """
-        return float(self.drill_depth)
+        depth = self.drill_depth
+        # FLOAT columns are already loaded as float
+        return depth if (type(depth) is float) else float(depth)
 
     @depth.setter
     def depth(self, dep: float) -> None:
@@ -237,9 +478,20 @@ class Well(Base, AbstractGeoObject):
         dep = float(dep)
         if dep < 0:
             raise ValueError("Depth is below 0! ({})".format(dep))
-        if (len(self.marker) > 0) and (dep < self.marker[-1].depth):
-            raise WellMarkerDepthException(
-                "New depth ({}) lower than depth of last marker {}".format(dep, self.marker[-1].depth))
+
+        state = sq.inspect(self)
+        if "marker" not in state.unloaded:
+            deepest = self.marker[-1].depth if (len(self.marker) > 0) else None
+        elif state.persistent:
+            # the depth of the deepest marker is requested instead of loading all marker of the well
+            deepest = state.session.query(sq.func.max(WellMarker.drill_depth)). \
+                filter(WellMarker.well_id == self.id).scalar()
+        else:
+            # new wells without marker (e.g. during the initialisation)
+            deepest = None
+
+        if (deepest is not None) and (dep < deepest):
+            raise WellMarkerDepthException("New depth ({}) lower than depth of last marker {}".format(dep, deepest))
         self.drill_depth = dep
 
     @property
@@ -286,14 +538,16 @@ class Well(Base, AbstractGeoObject):
         :raises TypeError: if marker is not of type WellMarker
         :raises ValueError: if the depth of the marker is larger than the drilled depth of the well
         """
-        if type(marker) is not WellMarker:
+        if not isinstance(marker, WellMarker):
             raise TypeError("marker {} is not of type WellMarker!".format(str(marker)))
         if marker.depth > self.depth:
             raise ValueError("Marker depth ({}) is larger than final well depth ({})!".format(marker.depth, self.depth))
         self.marker.append(marker)
+        # a marker moved from another well was expunged by the delete-orphan cascade of the old well, add it again
+        self.session.add(marker)
 
         # new sorting to ensure correct order without storage and reloading from the database
-        self.marker.sort(key=lambda x: x.depth)
+        self.marker.sort(key=_by_depth)
 
     def insert_multiple_marker(self, marker: List[WellMarker]) -> None:
         """
@@ -305,18 +559,78 @@ class Well(Base, AbstractGeoObject):
         :raises TypeError: if one of the marker is not of type WellMarker
         :raises ValueError: if the depth of a marker is larger than the drilled depth of the well
         """
+        well_depth = self.depth
+        marker_class = WellMarker
         for mark in marker:
-            if type(mark) is not WellMarker:
+            if not isinstance(mark, marker_class):
                 raise TypeError(
                     "At least on marker is not of type WellMarker ({}: {})!".format(str(mark), str(type(mark))))
-            if mark.depth > self.depth:
+
+        if len(marker) < _VECTORIZE_MARKER_COUNT:
+            for mark in marker:
+                if mark.depth > well_depth:
+                    raise ValueError("Marker depth ({}) is larger than final well depth ({})!".
+                                     format(mark.depth, well_depth))
+        else:
+            # one vectorized comparison instead of a Python loop, argmax returns the first marker below the well
+            too_deep = np.fromiter((mark.drill_depth for mark in marker), dtype=np.float64, count=len(marker)) > \
+                well_depth
+            if too_deep.any():
+                mark = marker[int(np.argmax(too_deep))]
                 raise ValueError("Marker depth ({}) is larger than final well depth ({})!".
-                                 format(mark.depth, self.depth))
+                                 format(mark.depth, well_depth))
 
-        self.marker += marker
+        self.marker.extend(marker)
+        # marker moved from other wells were expunged by the delete-orphan cascade of the old well, add them again
+        self.session.add_all(marker)
 
         # new sorting to ensure correct order without storage and reloading from the database
-        self.marker.sort(key=lambda x: x.depth)
+        # the existing marker are already sorted, the sort only merges the new ones
+        self.marker.sort(key=_by_depth)
+
+    def bulk_insert_marker(self, marker: List[WellMarker]) -> None:
+        """
+        Inserts a large number of marker directly into the database. In contrast to
+        :meth:`Well.insert_multiple_marker`, the marker are written with one INSERT statement (executemany) without the
+        unit of work of the session. The marker objects themselves are not attached to the session, the marker
+        relationship of the well is reloaded (ordered by depth) on the next access.
+        ATTENTION: The well and the horizons of the marker are flushed to the database, the inserted rows are committed
+        with the next commit of the session!
+
+        :param marker: List of marker to be inserted
+        :return: Nothing
+        :raises TypeError: if one of the marker is not of type WellMarker
+        :raises ValueError: if the depth of a marker is larger than the drilled depth of the well
+        """
+        marker_class = WellMarker
+        for mark in marker:
+            if not isinstance(mark, marker_class):
+                raise TypeError(
+                    "At least on marker is not of type WellMarker ({}: {})!".format(str(mark), str(type(mark))))
+        if len(marker) == 0:
+            return
+
+        well_depth = self.depth
+        depths = np.fromiter((mark.drill_depth for mark in marker), dtype=np.float64, count=len(marker))
+        deepest = int(np.argmax(depths))
+        if depths[deepest] > well_depth:
+            raise ValueError("Marker depth ({}) is larger than final well depth ({})!".
+                             format(marker[deepest].depth, well_depth))
+
+        # the well and new horizons need their ids, pending marker of the well are written before the reload
+        session = self.session
+        session.add(self)
+        session.add_all({mark.horizon for mark in marker if mark.horizon is not None})
+        session.flush()
+
+        well_id = self.id
+        session.execute(marker_class.__table__.insert(),
+                        [{"name_col": mark.name_col, "comment_col": mark.comment_col, "drill_depth": float(depth),
+                          "horizon_id": -1 if (mark.horizon is None) else mark.horizon.id, "well_id": well_id}
+                         for mark, depth in zip(marker, depths)])
+        session.expire(self, ["marker"])
+        # the rows were inserted without a flush
+        _marker_cache.pop(session, None)
 
     def get_marker_by_depth(self, depth: float) -> WellMarker or None:
         """
@@ -327,11 +641,30 @@ class Well(Base, AbstractGeoObject):
         :raises ValueError: if no marker was found for the committed depth or depth is not compatible to float
         """
         depth = float(depth)
-        for marker in self.marker:
-            if marker.depth == depth:
-                return marker
+        depths = self.__get_marker_depths()
+
+        # binary search on the cached depths of the sorted marker
+        index = bisect_left(depths, depth)
+        for i in (index - 1, index):
+            if (0 <= i < len(depths)) and isclose(depths[i], depth, abs_tol=1e-9):
+                return self.marker[i]
         raise ValueError("No marker found at depth {}".format(depth))
 
+    def __get_marker_depths(self) -> List[float]:
+        """
+        Returns the depths of the marker in ascending order. The list is cached until the marker collection or the
+        depth of one of its marker changes (see _reset_marker_depths).
+
+        :return: sorted list of the marker depths
+        """
+        depths = getattr(self, "_marker_depths", None)
+        if depths is None:
+            markers = self.marker
+            # marker appended directly to the relationship aren't sorted yet, a sorted list is only checked
+            markers.sort(key=_by_depth)
+            depths = self._marker_depths = [marker.drill_depth for marker in markers]
+        return depths
+
     def delete_marker(self, marker: WellMarker) -> None:
         """
         Deletes the marker from the well
@@ -341,7 +674,7 @@ class Well(Base, AbstractGeoObject):
         :raises TypeError: if marker is not of type WellMarker
         :raises ValueError: the marker is not part of the well
         """
-        if type(marker) is not WellMarker:
+        if not isinstance(marker, WellMarker):
             raise TypeError("marker {} is not of type WellMarker!".format(str(marker)))
 
         try:
@@ -358,7 +691,7 @@ class Well(Base, AbstractGeoObject):
         :return: Nothing
         :raises TypeError: if log is not of type WellLog
         """
-        if type(log) is not WellLog:
+        if not isinstance(log, WellLog):
             raise TypeError("log {} is not of type WellLog!".format(str(log)))
 
         self.logs.append(log)
@@ -372,7 +705,7 @@ class Well(Base, AbstractGeoObject):
         :raises TypeError: if log is not of type WellLog
         :raises ValueError: if log is not part of the well
         """
-        if type(log) is not WellLog:
+        if not isinstance(log, WellLog):
             raise TypeError("log {} is not of type WellLog!".format(str(log)))
 
         try:
@@ -403,38 +736,93 @@ class Well(Base, AbstractGeoObject):
         return False
 
     @classmethod
-    def load_by_wellname_from_db(cls, name: str, session: Session) -> "Well" or None:
+    def load_by_wellname_from_db(cls, name: str, session: Session,
+                                 eager: Tuple[str, ...] = ("marker", "logs")) -> "Well" or None:
         """
         Returns the well with the given name in the database connected to the SQLAlchemy Session session
 
         :param name: name of the requested well
         :param session: represents the database connection as SQLAlchemy Session
+        :param eager: names of relationships, which should be loaded together with the well (default: marker and
+                      logs, see :meth:`AbstractDBObject.load_all_from_db`)
         :return: As the name is a unique value, only one result can be returned or None
         :raises DatabaseException: if more than one result was found (the well name is an unique value)
         """
-        result = session.query(cls).filter(cls.wellname == name)
-        if result.count() == 0:
+        # wells already requested by name in this session are returned without a database query
+        well = _get_cached_well(session, name)
+        if well is not None:
+            return well
+
+        # two rows are enough to detect a duplicate
+        result = session.query(cls).options(*cls._eager_options(eager)).filter(cls.wellname == name).limit(2).all()
+        if len(result) == 0:
             return None
-        if result.count() == 1:
-            result = result.one()
-            result.session = session
-            return result
+        if len(result) == 1:
+            _cache_well(session, result[0])
+            return result[0]
 
-        raise DatabaseException("More than one ({}) well with the same name: {}! Database error!".
-                                format(result.count(), name))
+        raise DatabaseException("More than one well with the same name: {}! Database error!".format(name))
 
     @classmethod
-    def load_deeper_than_value_from_db(cls, session: Session, min_depth: float) -> List["Well"]:
+    def load_deeper_than_value_from_db(cls, session: Session, min_depth: float,
+                                       eager: Tuple[str, ...] = ("marker", "logs"),
+                                       stream: bool = False) -> List["Well"] or Iterator["Well"]:
         """
         Returns all wells with a drilled depth larger than min_depth in the database connected to the SQLAlchemy Session
         session
 
         :param min_depth: minimal drilled depth
         :param session: represents the database connection as SQLAlchemy Session
-        :return: a list of wells representing the result of the database query
-        """
-        result = session.query(cls).filter(cls.drill_depth >= min_depth)
-        result = result.order_by(cls.id).all()
-        for well in result:
-            well.session = session
-        return result
+        :param eager: names of relationships, which should be loaded together with the wells (default: marker and
+                      logs, see :meth:`AbstractDBObject.load_all_from_db`)
+        :param stream: if True, an iterator is returned, which loads the wells in batches of 500 rows. The iterator has
+                       to be consumed completely before the session is closed.
+        :return: a list of wells ordered by id representing the result of the database query or an iterator over the
+                 wells, if stream is True
+        """
+        # the session is set by the load event of AbstractDBObject
+        # ORDER BY id is served by the primary key on full scans; if ix_wells_depth is used for selective depths, only
+        # the matching rows are sorted. An index on (drill_depth, id) can't return a depth range in id order.
+        statement = cls._statement(
+            "deeper_than", lambda: sq.select(cls).where(cls.drill_depth >= sq.bindparam("min_depth")).order_by(cls.id))
+        if eager:
+            statement = statement.options(*cls._eager_options(eager))
+        if stream:
+            return iter(session.execute(statement, {"min_depth": min_depth},
+                                        execution_options={"yield_per": 500, "stream_results": True}).scalars())
+        return session.execute(statement, {"min_depth": min_depth}).scalars().all()
+
+
+@sq.event.listens_for(Well.marker, "append")
+@sq.event.listens_for(Well.marker, "remove")
+@sq.event.listens_for(Well, "expire")
+@sq.event.listens_for(Well, "refresh")
+def _reset_marker_depths(target: Well or None, *args: Any) -> None:
+    """
+    Drops the cached marker depths of a well, if a marker is added to or removed from its collection. Expiring or
+    refreshing the well reloads the collection and drops the cache, too. Wells already garbage collected are expired
+    with a target of None.
+    """
+    if target is not None:
+        target._marker_depths = None
+
+
+@sq.event.listens_for(WellMarker.drill_depth, "set")
+def _reset_well_marker_depths(target: WellMarker, *args: Any) -> None:
+    """
+    Drops the cached marker depths of the well of a marker, if the depth of the marker changes. The backref well is
+    only loaded after the first access, otherwise the well is taken from the identity map of the session.
+    """
+    well = target.__dict__.get("well")
+    if well is None:
+        session = sq.inspect(target).session
+        if (session is None) or (target.well_id is None):
+            return
+        well = session.identity_map.get(identity_key(Well, target.well_id))
+    if well is not None:
+        well._marker_depths = None
+
+
+for _ddl in _WELLS_RTREE_DDL:
+    sq.event.listen(Well.__table__, "after_create", sq.DDL(_ddl).execute_if(dialect="sqlite"))
+sq.event.listen(Well.__table__, "after_drop", sq.DDL("DROP TABLE IF EXISTS wells_rtree").execute_if(dialect="sqlite"))
@@ -59,7 +59,6 @@ setup(
         # Pick your license as you wish
         "License :: OSI Approved :: MIT License",
 
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -94,8 +93,9 @@ setup(
     # For an analysis of "install_requires" vs pip"s requirements files see:
     # https://packaging.python.org/en/latest/requirements.html
     install_requires=[
-        "SQLAlchemy>=1.2",
-        "alembic>=1.2"
+        "SQLAlchemy>=1.4",
+        "alembic>=1.2",
+        "numpy"
     ],  # Optional
 
     # List additional groups of dependencies here (e.g. development
@@ -114,5 +114,5 @@ setup(
         # "test": ["coverage"],
     },
 
-    python_requires=">=3.5"
+    python_requires=">=3.7"
 )